@@ -0,0 +1,208 @@
+from __future__ import division
+import argparse
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+from sun_rise_set import (sun_rise_set, iter_sun_rise_set, dec_to_clk, dec_to_clk_list, _declination, _eot_mins,
+                          _year_setup)
+from sun_plot import plot_series
+from sun_model import SunModel
+
+try:
+    import numpy as np
+    from sun_arrays import sun_rise_set_batch
+    from sun_position import solar_position
+except ImportError:  # numpy is optional, the many-sites case then loops over sun_rise_set(), solar_position is skipped
+    np = None
+
+# Benchmarks of the core computation paths
+#
+# example
+#   python benchmark.py -save baseline.json                 run every case and store the results
+#   python benchmark.py -compare baseline.json -threshold 0.2
+#                                                           fail (exit code 1) when a case is more than
+#                                                           20% slower per day than in the baseline
+#
+# Every case reports the best time of -repeat runs as ns per computed day, and the peak memory of one
+# extra run traced with tracemalloc (traced separately so tracing does not distort the timings).
+
+peri_date = "20200105 07:48"
+sols_date = "20191222 04:19"
+nyc = (40.716, -74.017, 0, peri_date, sols_date, -5, -4, "20200308", "20201101")
+num_sites = 200
+num_years = 10
+
+# planner sweeps for one site: elevation, timezone, then latitude along a route
+sweep_elevations = range(0, 2000, 100)
+sweep_tzs = [-7, -6, -5, -4]
+sweep_latitudes = [30 + i*0.5 for i in range(20)]
+
+
+def _sites(n):
+    return [(-55 + 110*i/n, -180 + 360*((i*7919) % n)/n, (i*37) % 1000, 0) for i in range(n)]
+
+
+def case_one_site_year():
+    return len(sun_rise_set(*nyc))
+
+
+def case_many_sites():
+    sites = _sites(num_sites)
+    if np is not None:
+        return sun_rise_set_batch(sites, peri_date, sols_date)['sunrise_dec'].size
+    days = 0
+    for site in sites:
+        days += len(sun_rise_set(site[0], site[1], site[2], peri_date, sols_date, site[3]))
+    return days
+
+
+def case_multi_year():
+    year_dates = dict((year, (str(year) + peri_date[4:], str(year - 1) + sols_date[4:]))
+                      for year in range(2020, 2020 + num_years))
+    days = 0
+    for _ in iter_sun_rise_set('20200101', str(2020 + num_years - 1) + '1231', 40.716, -74.017, 0, year_dates,
+                               -5):
+        days += 1
+    return days
+
+
+def case_orbit_terms():
+    _, num_days, peri_day, p_degs = _year_setup(peri_date, sols_date)
+    for day in range(1, num_days + 1):
+        _declination(day + 0.5)
+        _eot_mins(day + 0.5, p_degs, peri_day)
+    return num_days
+
+
+def case_sweep_calls():
+    days = 0
+    for elevation in sweep_elevations:
+        days += len(sun_rise_set(nyc[0], nyc[1], elevation, *nyc[3:]))
+    for std_tz in sweep_tzs:
+        days += len(sun_rise_set(nyc[0], nyc[1], 0, peri_date, sols_date, std_tz, std_tz + 1, *nyc[7:]))
+    for latitude in sweep_latitudes:
+        days += len(sun_rise_set(latitude, *nyc[1:]))
+    return days
+
+
+def case_sweep_model():
+    model = SunModel(*nyc)
+    days = 0
+    for _, results in model.sweep('elevation', sweep_elevations):
+        days += len(results)
+    model.elevation = 0
+    for std_tz in sweep_tzs:
+        model.update(std_tz=std_tz, dst_tz=std_tz + 1)
+        days += len(model.results())
+    model.update(std_tz=nyc[5], dst_tz=nyc[6])
+    for _, results in model.sweep('latitude', sweep_latitudes):
+        days += len(results)
+    return days
+
+
+# elevation/azimuth every minute of the year
+def case_solar_position():
+    return solar_position(nyc[0], nyc[1], '20200101', '20201231', 60, nyc[5])['elevation'].shape[0]
+
+
+_format_results = sun_rise_set(*nyc)
+_format_values = [i.sunrise_dec for i in _format_results] * 10
+
+
+def case_format_dec_to_clk():
+    for v in _format_values:
+        dec_to_clk(v, 12, False)
+    return len(_format_values)
+
+
+def case_format_bulk():
+    return len(dec_to_clk_list(_format_values, 12, False))
+
+
+def case_gui_data_prep():
+    results = sun_rise_set(*nyc)
+    return len(plot_series(results, 2020)['date_list'])
+
+
+cases = [('one_site_year', case_one_site_year),
+         ('many_sites', case_many_sites),
+         ('multi_year', case_multi_year),
+         ('orbit_terms', case_orbit_terms),
+         ('sweep_calls', case_sweep_calls),
+         ('sweep_model', case_sweep_model),
+         ('format_dec_to_clk', case_format_dec_to_clk),
+         ('format_bulk', case_format_bulk),
+         ('gui_data_prep', case_gui_data_prep)]
+if np is not None:
+    cases.append(('solar_position', case_solar_position))
+
+
+# Runs the cases
+# inputs:
+#   names               names of the cases to run, None for all
+#   repeat              timed runs per case, the best one is reported
+# outputs:
+#   dict of case name -> {'ns_per_day', 'days', 'peak_kib'}
+def run(names=None, repeat=5):
+    results = {}
+    for name, func in cases:
+        if names and name not in names:
+            continue
+        days = func()  # warm up, and the number of days one run computes
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[name] = {'ns_per_day': best * 1e9 / days, 'days': days, 'peak_kib': peak / 1024}
+    return results
+
+
+# Compares results against a baseline
+# outputs:
+#   list of (case name, baseline ns/day, current ns/day) for the cases slower than threshold allows
+def regressions(results, baseline, threshold):
+    slower = []
+    for name, res in sorted(results.items()):
+        base = baseline.get('results', baseline).get(name)
+        if base is not None and res['ns_per_day'] > base['ns_per_day'] * (1 + threshold):
+            slower.append((name, base['ns_per_day'], res['ns_per_day']))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-cases', '--cases', help='cases to run, default all', nargs='*', default=None,
+                        choices=[name for name, _ in cases])
+    parser.add_argument('-repeat', '--repeat', help='timed runs per case', type=int, default=5)
+    parser.add_argument('-save', '--save', help='write the results to this JSON baseline', default=None)
+    parser.add_argument('-compare', '--compare', help='JSON baseline to compare against', default=None)
+    parser.add_argument('-threshold', '--threshold', help='allowed slowdown, 0.2 is 20%%', type=float,
+                        default=0.2)
+    args = parser.parse_args()
+
+    results = run(args.cases, args.repeat)
+    print('{0:<20} {1:>14} {2:>10} {3:>12}'.format('case', 'ns/day', 'days', 'peak KiB'))
+    for name, res in sorted(results.items()):
+        print('{0:<20} {1:>14.1f} {2:>10} {3:>12.1f}'.format(name, res['ns_per_day'], res['days'],
+                                                             res['peak_kib']))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': platform.python_version(), 'numpy': np is not None, 'results': results}, f,
+                      indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        slower = regressions(results, baseline, args.threshold)
+        for name, base, current in slower:
+            print('REGRESSION {0}: {1:.1f} -> {2:.1f} ns/day'.format(name, base, current))
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,44 +1,109 @@
 import argparse
-from sun_rise_set import sun_rise_set, dec_to_clk
+import sys
+from sun_rise_set import sun_rise_set, PhaseStats
+from location_runner import read_locations, run_locations
+from sun_output import formats, format_chunk, header, open_output
+from sun_epochs import year_dates
+from dst_rules import regions
 
 # example
 # -lat 40.716 -long -74 -elev 0 -peri "20200105 07:48" -sols "20191222 04:19" -std_tz -5 -dst_tz -4 -dst_start 20200308 -dst_end 20201101 -title "NYC"
+#
+# example, every location in a CSV/JSONL file (see location_runner.py for the file layout)
+# -locations sites.csv -peri "20200105 07:48" -sols "20191222 04:19" -workers 64 -chunk_size 32
+#
+# -year 2020 can be used instead of -peri/-sols, and -dst_rule US instead of -dst_tz/-dst_start/-dst_end
+#
+# add -format csv or -format jsonl for raw decimal values, and -output PATH to write to a file
 
 parser = argparse.ArgumentParser()
 
-parser.add_argument('-lat', '--latitude', help='latitude, decimal value, North is positive', required=True)
-parser.add_argument('-long', '--longitude', help='longitude, decimal value, West is positive', required=True)
-parser.add_argument('-elev', '--elevation', help='elevation in meters', required=True)
-parser.add_argument('-peri', '--perihelion_date', help='date/time of perihelion YYYYMMDD HH:MM', required=True)
-parser.add_argument('-sols', '--solstice_date', help='date/time of previous solstice YYYYMMDD HH:MM', required=True)
-parser.add_argument('-std_tz', '--std_tz', help='Standard Timezone', required=True)
+parser.add_argument('-lat', '--latitude', help='latitude, decimal value, North is positive', required=False)
+parser.add_argument('-long', '--longitude', help='longitude, decimal value, West is positive', required=False)
+parser.add_argument('-elev', '--elevation', help='elevation in meters', required=False)
+parser.add_argument('-peri', '--perihelion_date', help='date/time of perihelion YYYYMMDD HH:MM', required=False)
+parser.add_argument('-sols', '--solstice_date', help='date/time of previous solstice YYYYMMDD HH:MM', required=False)
+parser.add_argument('-year', '--year', help='year 1900-2100, replaces -peri/-sols with the built-in table',
+                    required=False, type=int, default=None)
+parser.add_argument('-std_tz', '--std_tz', help='Standard Timezone', required=False)
 parser.add_argument('-dst_tz', '--dst_tz', help='DST Timezone', required=False, default=999)
 parser.add_argument('-dst_start', '--dst_start_date', help='DST Start Date YYYYMMDD',  required=False, default='')
 parser.add_argument('-dst_end', '--dst_end_date', help='DST End Date YYYYMMDD', required=False, default='')
+parser.add_argument('-dst_rule', '--dst_rule', help='DST region, replaces -dst_start/-dst_end', required=False,
+                    choices=sorted(regions), default=None)
 parser.add_argument('-title', '--title', help='Title of Plot', required=False, default='No Title')
+parser.add_argument('-locations', '--locations', help='CSV or JSONL file of locations, replaces -lat/-long/...',
+                    required=False, default=None)
+parser.add_argument('-workers', '--workers', help='worker processes for -locations, default one per CPU core',
+                    required=False, type=int, default=None)
+parser.add_argument('-chunk_size', '--chunk_size', help='locations sent to a worker at a time',
+                    required=False, type=int, default=16)
+parser.add_argument('-format', '--format', help='output format', required=False, choices=formats, default='text')
+parser.add_argument('-output', '--output', help='output file, default stdout', required=False, default=None)
+parser.add_argument('-profile', '--profile', help='print time spent per phase to stderr', required=False,
+                    action='store_true')
 
-args = parser.parse_args()
-latitude = float(args.latitude)
-longitude = float(args.longitude)
-elevation = float(args.elevation)
-peri_date = args.perihelion_date
-sols_date = args.solstice_date
-std_tz = float(args.std_tz)
-dst_tz = float(args.dst_tz)
-dst_start_date = args.dst_start_date
-dst_end_date = args.dst_end_date
-res_str_title = args.title
 
+def main():
+    args = parser.parse_args()
+    peri_date = args.perihelion_date
+    sols_date = args.solstice_date
+    if peri_date is None or sols_date is None:
+        if args.year is None:
+            parser.error('either -peri and -sols, or -year is required')
+        peri_date, sols_date = year_dates(args.year)
+    stats = PhaseStats() if args.profile else None
+    if stats is not None:
+        t = stats.now()
 
-def dc2(dec_time):
-    return dec_to_clk(dec_time, 12, False)
+    if args.locations is not None:
+        locations = read_locations(args.locations, peri_date, sols_date)
+        if stats is not None:
+            t = stats.lap('read_locations', t)
+        out = open_output(args.output)
+        try:
+            run_locations(locations, out, workers=args.workers, chunk_size=args.chunk_size, fmt=args.format)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if stats is not None:
+            stats.lap('run_locations', t)
+            sys.stderr.write(stats.summary() + '\n')
+        return
 
+    if None in (args.latitude, args.longitude, args.elevation, args.std_tz):
+        parser.error('-lat, -long, -elev and -std_tz are required unless -locations is given')
 
-results = sun_rise_set(latitude, longitude, elevation, peri_date, sols_date, std_tz, dst_tz,
-                       dst_start_date, dst_end_date)
+    latitude = float(args.latitude)
+    longitude = float(args.longitude)
+    elevation = float(args.elevation)
+    std_tz = float(args.std_tz)
+    dst_tz = float(args.dst_tz)
+    dst_start_date = args.dst_start_date
+    dst_end_date = args.dst_end_date
+    res_str_title = args.title
 
-res_str = res_str_title + ": {0:}  Solar Noon = {1:}  Sunrise = {2:}  Sunset = {3:}  Daylight(hrs) = {4:5.3f}"
-res_str += "  Sunrise Change (mins) = {5:5.3f}  Sunset Change (mins) = {6:5.3f}"
-for i in results:
-    print(res_str.format(i.cal_date, dc2(i.solar_noon_dec), dc2(i.sunrise_dec), dc2(i.sunset_dec), i.daylight_hours,
-                         i.sunrise_change_mins, i.sunset_change_mins))
+    if stats is not None:
+        t = stats.lap('inputs', t)
+
+    results = sun_rise_set(latitude, longitude, elevation, peri_date, sols_date, std_tz, dst_tz,
+                           dst_start_date, dst_end_date, args.dst_rule, stats=stats)
+    if stats is not None:
+        t = stats.now()
+
+    out = open_output(args.output)
+    try:
+        chunk = header(args.format) + format_chunk(res_str_title, results, args.format)
+        if stats is not None:
+            t = stats.lap('format', t)
+        out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if stats is not None:
+        stats.lap('write', t)
+        sys.stderr.write(stats.summary() + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+from datetime import date
+
+# Rule based DST, so the DST dates do not have to be looked up for every year and region
+#
+# Every region is a list of periods (first_year, last_year, start, end, save_hrs), last_year None for
+# "until further notice".  start and end are (month, week, weekday, 'HH:MM') rules:
+#   week        1 to 4 for the first to fourth weekday of the month, -1 for the last one
+#   weekday     0 is Monday ... 6 is Sunday
+#   HH:MM       local clock time of the change, for reference only: like the dst_start_date/dst_end_date
+#               inputs of sun_rise_set(), the whole start day is on DST and the whole end day on standard time
+# A period with start None has no DST.  Years not covered by any period of a region raise a ValueError.
+#
+#   US      United States except Arizona and Hawaii (use 'none' there)
+#   AU      New South Wales, Victoria, Tasmania, ACT and South Australia, southern hemisphere so DST
+#           wraps around the new year (use 'none' for Queensland, Western Australia and Northern Territory)
+#   MX      Mexico, DST was abolished after 2022
+#   none    no DST
+sunday = 6
+
+regions = {
+    'US': [(2007, None, (3, 2, sunday, '02:00'), (11, 1, sunday, '02:00'), 1),
+           (1987, 2006, (4, 1, sunday, '02:00'), (10, -1, sunday, '02:00'), 1)],
+    'AU': [(2008, None, (10, 1, sunday, '02:00'), (4, 1, sunday, '03:00'), 1)],
+    'MX': [(2023, None, None, None, 0),
+           (2002, 2022, (4, 1, sunday, '02:00'), (10, -1, sunday, '02:00'), 1)],
+    'none': [(1, None, None, None, 0)],
+}
+
+
+# Day of the year of a (month, week, weekday, time) rule
+def _rule_day(year, rule):
+    month, week, weekday = rule[:3]
+    if week > 0:
+        first = date(year, month, 1)
+        day = first.toordinal() + (weekday - first.weekday()) % 7 + (week - 1) * 7
+    else:
+        last = date(year + month // 12, month % 12 + 1, 1).toordinal() - 1
+        day = last - (date.fromordinal(last).weekday() - weekday) % 7
+    return day - date(year, 1, 1).toordinal() + 1
+
+
+# DST window of a region for one year, compiled once per (region, year)
+# inputs:
+#   region              one of regions
+#   year                the year
+# outputs:
+#   dst_days            (first day of DST, first day back on standard time) as days of the year, or None if
+#                       the year has no DST, same as _dst_days in sun_rise_set.py
+#   save_hrs            hours the clocks move forward
+def dst_window(region, year):
+    window = _windows.get((region, year))
+    if window is None:
+        window = _windows[(region, year)] = _compile_window(region, year)
+    return window
+
+
+# windows already worked out by dst_window, a plain dict so sun_rise_set.py keeps importing on Python 2.7
+_windows = {}
+
+
+def _compile_window(region, year):
+    if region not in regions:
+        raise ValueError('unknown DST region: {0}, expected one of {1}'.format(region, ', '.join(sorted(regions))))
+    for first_year, last_year, start, end, save_hrs in regions[region]:
+        if first_year <= year and (last_year is None or year <= last_year):
+            if start is None:
+                return None, 0
+            return (_rule_day(year, start), _rule_day(year, end)), save_hrs
+    raise ValueError('no DST rule for {0} in {1}'.format(region, year))
+
+
+# Years covered by the rules of a region, years outside of them raise a ValueError in dst_window
+# inputs:
+#   region              one of regions
+# outputs:
+#   first year, last year (None for "until further notice")
+def rule_years(region):
+    if region not in regions:
+        raise ValueError('unknown DST region: {0}, expected one of {1}'.format(region, ', '.join(sorted(regions))))
+    periods = regions[region]
+    last_years = [period[1] for period in periods]
+    return min(period[0] for period in periods), None if None in last_years else max(last_years)
@@ -0,0 +1,82 @@
+from __future__ import division
+from functools import lru_cache
+from sun_rise_set import _declination, _eot_mins, _horizon_rads, _year_setup
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only the *_arr lookups need it
+    np = None
+
+
+# Grid resolution of the tables, in samples per day
+steps_per_day = 24
+
+# Worst case error of the linear interpolation, |f''| * h^2 / 8 with h = 1/24 day:
+#   declination     |f''| < 1.4e-4 rad/day^2    ->  error < 3.1e-8 rad
+#   eot             |f''| < 1.6e-2 min/day^2    ->  error < 4e-6 min
+DECLINATION_ERROR_RADS = 3.1e-8
+EOT_ERROR_MINS = 4e-6
+
+
+class Ephemeris(object):
+    """ Declination and equation of time of one year, tabulated on a fine grid of fractional days """
+    __slots__ = ['_year', '_num_days', '_start', '_decl', '_eot', '_x_arr', '_decl_arr', '_eot_arr']
+
+    def __init__(self, year, num_days, peri_day, p_degs):
+        self._year = year
+        self._num_days = num_days
+        # sun_rise_set() samples days 0..num_days shifted by +0.5 - longitude/360, i.e. -0.5..num_days+1
+        self._start = -1
+        n = (num_days + 3) * steps_per_day + 1
+        x = [self._start + i/steps_per_day for i in range(n)]
+        self._decl = [_declination(d) for d in x]
+        self._eot = [_eot_mins(d, p_degs, peri_day) for d in x]
+        if np is not None:
+            self._x_arr = np.array(x)
+            self._decl_arr = np.array(self._decl)
+            self._eot_arr = np.array(self._eot)
+
+    @property
+    def year(self):
+        return self._year
+
+    @property
+    def num_days(self):
+        return self._num_days
+
+    def _interp(self, table, day_of_year):
+        pos = (day_of_year - self._start) * steps_per_day
+        i = int(pos)
+        frac = pos - i
+        return table[i] + (table[i+1] - table[i]) * frac
+
+    # see _declination in sun_rise_set.py
+    def declination(self, day_of_year):
+        return self._interp(self._decl, day_of_year)
+
+    # see _eot_mins in sun_rise_set.py, p_degs and peri_day are fixed by the table
+    def eot_mins(self, day_of_year):
+        return self._interp(self._eot, day_of_year)
+
+    # see _horizon_rads in sun_rise_set.py, refraction is not tabulated
+    def horizon_rads(self, elevation):
+        return _horizon_rads(elevation)
+
+    # array versions of declination() and eot_mins(), require numpy
+    def declination_arr(self, day_of_year):
+        return np.interp(day_of_year, self._x_arr, self._decl_arr)
+
+    def eot_mins_arr(self, day_of_year):
+        return np.interp(day_of_year, self._x_arr, self._eot_arr)
+
+
+# Cached Ephemeris for a year, the most recently used years are kept
+# inputs:
+#   peri_date           date of perihelion in London YYYYMMDD HH:MM'
+#   sols_date           date of previous solstice in London YYYYMMDD HH:MM'
+# outputs:
+#   Ephemeris
+@lru_cache(maxsize=16)
+def get_ephemeris(peri_date, sols_date):
+    year, num_days, peri_day, p_degs = _year_setup(peri_date, sols_date)
+    return Ephemeris(year, num_days, peri_day, p_degs)
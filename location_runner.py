@@ -0,0 +1,77 @@
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from sun_rise_set import sun_rise_set
+from sun_output import format_chunk, header
+
+# Location files, one location per CSV row (with a header line) or per JSONL line, using these field names:
+#   latitude, longitude, elevation, std_tz      required
+#   dst_tz, dst_start_date, dst_end_date        optional, see sun_rise_set()
+#   dst_rule                                    optional DST region of dst_rules.py, replaces the DST dates
+#   perihelion_date, solstice_date              optional, default to the values given on the command line
+#   title                                       optional, defaults to 'lat, long'
+#
+# example CSV:
+#   title,latitude,longitude,elevation,std_tz,dst_tz,dst_start_date,dst_end_date
+#   NYC,40.716,-74.017,0,-5,-4,20200308,20201101
+#   Mumbai,18.95,72.833,0,5.5,,,
+
+
+# Reads a CSV or JSONL location file (chosen by the file extension)
+# inputs:
+#   path                path of the location file
+#   peri_date           default date of perihelion in London YYYYMMDD HH:MM'
+#   sols_date           default date of previous solstice in London YYYYMMDD HH:MM'
+# outputs:
+#   list of dicts with the arguments of sun_rise_set() plus 'title'
+def read_locations(path, peri_date, sols_date):
+    with open(path) as f:
+        if os.path.splitext(path)[1].lower() in ('.jsonl', '.json'):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    locations = []
+    for row in rows:
+        row = dict((k, v) for k, v in row.items() if v not in ('', None))
+        latitude = float(row['latitude'])
+        longitude = float(row['longitude'])
+        locations.append({'title': str(row.get('title', '{0}, {1}'.format(latitude, longitude))),
+                          'latitude': latitude,
+                          'longitude': longitude,
+                          'elevation': float(row['elevation']),
+                          'peri_date': row.get('perihelion_date', peri_date),
+                          'sols_date': row.get('solstice_date', sols_date),
+                          'std_tz': float(row['std_tz']),
+                          'dst_tz': float(row.get('dst_tz', 999)),
+                          'dst_start_date': str(row.get('dst_start_date', '')),
+                          'dst_end_date': str(row.get('dst_end_date', '')),
+                          'dst_rule': row.get('dst_rule')})
+    return locations
+
+
+# Worker, runs in a child process
+def _run_location(fmt, loc):
+    results = sun_rise_set(loc['latitude'], loc['longitude'], loc['elevation'], loc['peri_date'],
+                           loc['sols_date'], loc['std_tz'], loc['dst_tz'], loc['dst_start_date'],
+                           loc['dst_end_date'], loc['dst_rule'])
+    return format_chunk(loc['title'], results, fmt)
+
+
+# Runs every location of a location file across a process pool, output is written in input order
+# inputs:
+#   locations           see read_locations()
+#   out                 file object the results are written to
+#   workers             number of worker processes, None for one per CPU core
+#   chunk_size          number of locations sent to a worker at a time
+#   fmt                 output format, see sun_output.formats
+def run_locations(locations, out=sys.stdout, workers=None, chunk_size=16, fmt='text'):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    out.write(header(fmt))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for text in executor.map(partial(_run_location, fmt), locations, chunksize=chunk_size):
+            out.write(text)
@@ -0,0 +1,163 @@
+from __future__ import division
+import argparse
+import sys
+from datetime import datetime, timedelta
+from math import sin, cos, radians
+from sun_epochs import year_dates, first_year, last_year
+
+try:
+    import erfa
+except ImportError:  # pyerfa is only needed to generate the table, -check runs without it
+    erfa = None
+
+# Generates the perihelion/solstice table of sun_epochs.py and checks it against published times
+#
+#   perihelion      zero of the radial velocity of the heliocentric Earth (not the Earth-Moon barycenter), from
+#                   the SOFA/ERFA epv00 ephemeris (pip install pyerfa), within a minute of the published times
+#   solstice        Meeus, "Astronomical Algorithms" (2nd ed.), ch. 27, Table 27.B/27.C, within about a minute
+#   delta T         Espenak and Meeus polynomials, NASA Five Millennium Canon of Solar Eclipses (2006), times
+#                   after 2050 depend on the extrapolated delta T
+#
+# example
+#   python make_epochs.py           prints the table, paste it into sun_epochs.py
+#   python make_epochs.py -check    compares sun_epochs.py against the published times below, exit code 1 if off
+
+# published times (UT) of a few years
+#   perihelion      F. Espenak, "Earth at Perihelion and Aphelion: 2001 to 2100", astropixels.com
+#   solstice        U.S. Naval Observatory, "Earth's Seasons and Apsides"
+published_perihelion = {2015: '20150104 06:36', 2016: '20160102 22:49', 2017: '20170104 14:18',
+                        2018: '20180103 05:35', 2019: '20190103 05:20', 2020: '20200105 07:48',
+                        2021: '20210102 13:51', 2022: '20220104 06:55', 2023: '20230104 16:17',
+                        2024: '20240103 00:39', 2025: '20250104 13:28'}
+published_solstice = {2015: '20151222 04:48', 2016: '20161221 10:44', 2017: '20171221 16:28',
+                      2018: '20181221 22:23', 2019: '20191222 04:19', 2020: '20201221 10:02',
+                      2021: '20211221 15:59', 2022: '20221221 21:48', 2023: '20231222 03:27',
+                      2024: '20241221 09:20'}
+
+# Meeus Table 27.C, periodic terms of the equinoxes and solstices (A, B degrees, C degrees per century)
+_a = [485, 203, 199, 182, 156, 136, 77, 74, 70, 58, 52, 50, 45, 44, 29, 18, 17, 16, 14, 12, 12, 12, 9, 8]
+_b = [324.96, 337.23, 342.08, 27.85, 73.14, 171.52, 222.54, 296.72, 243.58, 119.81, 297.17, 21.02, 247.54,
+      325.15, 60.93, 155.12, 288.79, 198.04, 199.76, 95.39, 287.11, 320.81, 227.73, 15.45]
+_c = [1934.136, 32964.467, 20.186, 445267.112, 45036.886, 22518.443, 65928.934, 3034.906, 9037.513,
+      33718.147, 150.678, 2281.226, 29929.562, 31555.956, 4443.417, 67555.328, 4562.452, 62894.029,
+      31436.921, 14577.848, 31931.756, 34777.259, 1222.114, 16859.074]
+
+
+# Julian date to datetime
+def _jd_to_dt(jd):
+    return datetime(2000, 1, 1, 12) + timedelta(days=jd - 2451545.0)
+
+
+# TT - UT in seconds for the middle of a year, Espenak and Meeus
+def delta_t(year):
+    y = year + 0.5
+    if y < 1900:
+        t = y - 1860
+        return 7.62 + 0.5737*t - 0.251754*t**2 + 0.01680668*t**3 - 0.0004473624*t**4 + t**5/233174
+    if y < 1920:
+        t = y - 1900
+        return -2.79 + 1.494119*t - 0.0598939*t**2 + 0.0061966*t**3 - 0.000197*t**4
+    if y < 1941:
+        t = y - 1920
+        return 21.20 + 0.84493*t - 0.076100*t**2 + 0.0020936*t**3
+    if y < 1961:
+        t = y - 1950
+        return 29.07 + 0.407*t - t**2/233 + t**3/2547
+    if y < 1986:
+        t = y - 1975
+        return 45.45 + 1.067*t - t**2/260 - t**3/718
+    if y < 2005:
+        t = y - 2000
+        return 63.86 + 0.3345*t - 0.060374*t**2 + 0.0017275*t**3 + 0.000651814*t**4 + 0.00002373599*t**5
+    if y < 2050:
+        t = y - 2000
+        return 62.92 + 0.32217*t + 0.005589*t**2
+    if y < 2150:
+        return -20 + 32*((y - 1820)/100)**2 - 0.5628*(2150 - y)
+    raise ValueError('no delta T for {0}'.format(year))
+
+
+# December solstice of a year, UT, Meeus ch. 27
+def dec_solstice(year):
+    y = (year - 2000) / 1000
+    jde0 = 2451900.05952 + 365242.74049*y - 0.06223*y**2 - 0.00823*y**3 + 0.00032*y**4
+    t = (jde0 - 2451545.0) / 36525
+    w = 35999.373*t - 2.47
+    dl = 1 + 0.0334*cos(radians(w)) + 0.0007*cos(radians(2*w))
+    s = sum(a*cos(radians(b + c*t)) for a, b, c in zip(_a, _b, _c))
+    return _jd_to_dt(jde0 + 0.00001*s/dl - delta_t(year)/86400)
+
+
+# radial velocity of the Earth times its distance (au^2/day), negative before the perihelion
+def _r_dot(jd):
+    pvh, _ = erfa.epv00(2400000.5, jd - 2400000.5)
+    p, v = pvh['p'], pvh['v']
+    return float(p[0]*v[0] + p[1]*v[1] + p[2]*v[2])
+
+
+# Perihelion of a year, UT
+def perihelion(year):
+    if erfa is None:
+        raise ImportError('pyerfa is needed to compute the perihelion (pip install pyerfa)')
+    jd = sum(erfa.cal2jd(year, 1, 1))
+    while not (_r_dot(jd) < 0 <= _r_dot(jd + 0.25)):
+        jd += 0.25
+    low, high = jd, jd + 0.25
+    for _ in range(40):
+        mid = (low + high) / 2
+        if _r_dot(mid) < 0:
+            low = mid
+        else:
+            high = mid
+    return _jd_to_dt(low - delta_t(year)/86400)
+
+
+# nearest whole minute
+def _round_minute(dt):
+    return (dt + timedelta(seconds=30)).replace(second=0, microsecond=0)
+
+
+# Table entries of sun_epochs.py, see there for the layout
+def table_entries(start_year=first_year, end_year=last_year):
+    entries = []
+    for year in range(start_year, end_year + 1):
+        peri = _round_minute(perihelion(year))
+        sols = _round_minute(dec_solstice(year - 1))
+        assert peri.year == year and peri.month == 1 and sols.year == year - 1 and 20 <= sols.day <= 23
+        entries.append('{0:04d}{1:04d}'.format((peri.day - 1)*1440 + peri.hour*60 + peri.minute,
+                                               (sols.day - 20)*1440 + sols.hour*60 + sols.minute))
+    return entries
+
+
+# Years of sun_epochs.py more than max_error_mins away from the published times
+# outputs:
+#   list of (year, 'perihelion' or 'solstice', table time, published time)
+def check(max_error_mins=1):
+    errors = []
+    kinds = [('perihelion', published_perihelion, 0, 0), ('solstice', published_solstice, 1, 1)]
+    for name, published, index, year_offset in kinds:
+        for year, expected in sorted(published.items()):
+            table = year_dates(year + year_offset)[index]
+            diff = datetime.strptime(table, '%Y%m%d %H:%M') - datetime.strptime(expected, '%Y%m%d %H:%M')
+            if abs(diff.total_seconds()) > max_error_mins*60:
+                errors.append((year, name, table, expected))
+    return errors
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-check', '--check', help='compare sun_epochs.py against the published times',
+                        action='store_true')
+    args = parser.parse_args()
+
+    if args.check:
+        errors = check()
+        for year, name, table, expected in errors:
+            print('{0} {1}: table {2}, published {3}'.format(year, name, table, expected))
+        print('{0} of {1} published times off by more than a minute'.format(
+            len(errors), len(published_perihelion) + len(published_solstice)))
+        sys.exit(1 if errors else 0)
+
+    entries = table_entries()
+    for i in range(0, len(entries), 10):
+        print("    '" + ' '.join(entries[i:i + 10]) + " '")
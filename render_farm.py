@@ -0,0 +1,67 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from sun_rise_set import sun_rise_set
+from sun_plot import plot_series, build_figure, fill_figure
+
+# Headless rendering of the four-panel plot (see sunrise_gui_cli.py) for many locations
+#
+# Every worker process builds the figure once on the Agg backend and then, per location, only swaps the line
+# data and the title before saving, so the axes, grid, tick locators and legends are never rebuilt.
+#
+# example, every location of a CSV/JSONL file (see location_runner.py for the file layout)
+#   python sunrise_gui_cli.py -locations sites.csv -year 2020 -out_dir charts -format png -workers 8
+
+image_formats = ['png', 'svg']
+
+# figure of the worker process, see _init_worker
+_template = None
+
+
+def _init_worker():
+    global _template
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    _template = build_figure(fig)
+
+
+# file name of a location, the position keeps locations with the same title apart
+def _file_name(index, title, fmt):
+    return '{0:05d}_{1}.{2}'.format(index, re.sub(r'[^A-Za-z0-9]+', '_', title).strip('_'), fmt)
+
+
+# Worker, runs in a child process
+def _render_location(out_dir, fmt, dpi, item):
+    index, loc = item
+    results = sun_rise_set(loc['latitude'], loc['longitude'], loc['elevation'], loc['peri_date'],
+                           loc['sols_date'], loc['std_tz'], loc['dst_tz'], loc['dst_start_date'],
+                           loc['dst_end_date'], loc['dst_rule'])
+    fill_figure(_template, plot_series(results, int(loc['peri_date'][:4])), loc['title'], fixed_x=True)
+    path = os.path.join(out_dir, _file_name(index, loc['title'], fmt))
+    _template['fig'].savefig(path, format=fmt, dpi=dpi)
+    return path
+
+
+# Renders one chart per location across a process pool
+# inputs:
+#   locations           see location_runner.read_locations()
+#   out_dir             directory the charts are written to, created if needed
+#   fmt                 one of image_formats
+#   dpi                 resolution of png charts
+#   workers             number of worker processes, None for one per CPU core
+#   chunk_size          number of locations sent to a worker at a time
+# outputs:
+#   list of the chart paths, in input order
+def render_locations(locations, out_dir, fmt='png', dpi=100, workers=None, chunk_size=16):
+    if fmt not in image_formats:
+        raise ValueError('unknown image format: ' + str(fmt))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        return list(executor.map(partial(_render_location, out_dir, fmt, dpi), enumerate(locations),
+                                 chunksize=chunk_size))
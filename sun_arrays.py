@@ -0,0 +1,273 @@
+from __future__ import division
+from math import pi, radians, pow, sin, cos
+from sun_rise_set import (sun_rise_set, SunTable, dec_to_clk_list, _clk_from_parts, _year_setup, _dst_setup,
+                          _threshold_columns, e, orb_per, axis_norm_degs, NORMAL, POLAR_DAY, POLAR_NIGHT)
+from ephemeris import get_ephemeris
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the scalar engine in sun_rise_set.py is used instead
+    np = None
+
+
+# The array engine evaluates the same formulas as sun_rise_set() in float64, only the order of a few
+# operations differs.  Results agree with the scalar engine to within TOLERANCE_HRS for the time columns
+# (solar noon, sunrise, sunset, daylight hours) and TOLERANCE_HRS*60 for the change columns (minutes).
+TOLERANCE_HRS = 1e-9
+
+columns = ['solar_noon_dec', 'sunrise_dec', 'sunset_dec', 'daylight_hours', 'sunrise_change_mins',
+           'sunset_change_mins', 'status']
+
+
+# Equation of time for an array of days, see _eot_mins in sun_rise_set.py
+def _eot_mins_arr(day_of_year, p_degs, peri_day):
+    time_mins = (24*60) / (2*pi)
+    p = radians(p_degs)
+    axis_norm_rads = radians(axis_norm_degs)
+    t1 = (axis_norm_rads/2)*(1 - 4*pow(e, 2))
+    tan2_1_4e2 = (1 - cos(2*t1)) / (1 + cos(2*t1))
+    tan2 = (1-cos(axis_norm_rads)) / (1 + cos(axis_norm_rads))
+    e2 = 2*e
+    tan2_2e = 2*e*tan2
+    tan4_1_2 = (1/2)*pow(tan2, 2)
+    e2_5_4 = (5/4)*(pow(e, 2))
+    tan4_2e = 2*e*pow(tan2, 2)
+    tan2_2e_13_4 = (13/4)*(pow(e, 2))*tan2
+    tan6_1_3 = (1/3)*pow(tan2, 3)
+    m = 2*pi*((day_of_year - peri_day)/orb_per)
+    return -(tan2_1_4e2*np.sin(2*(m+p)) + e2*np.sin(m) -
+             tan2_2e*np.sin(m + 2*p) + tan2_2e*np.sin(3*m + 2*p) +
+             tan4_1_2*np.sin(4*(m+p)) + e2_5_4*np.sin(2*m) - tan4_2e*np.sin(3*m + 4*p) +
+             tan4_2e*np.sin((5*m) + (4*p)) + tan2_2e_13_4*np.sin(4*m + 2*p) +
+             tan6_1_3*np.sin(6*(m+p)))*time_mins
+
+
+# Sun's declination for an array of days, see _declination in sun_rise_set.py
+def _declination_arr(day_of_year):
+    sin_axis_norm = sin(radians(axis_norm_degs))
+    ratio360 = 360/orb_per
+    ratio_pi_e = (360/pi)*e
+    d_offset = day_of_year - 1
+    return -(np.arcsin(sin_axis_norm *
+                       np.cos(np.radians(ratio360*(d_offset+10) +
+                                         ratio_pi_e*np.sin(np.radians(ratio360*(d_offset-2)))))))
+
+
+# DST correction (hours) for days 1..num_days, see _dst_correction in sun_rise_set.py
+def _dst_correction_arr(num_days, std_tz, dst_tz, dst_days):
+    if dst_days is None:
+        return np.zeros(num_days)
+    dst_start_day, dst_end_day = dst_days
+    day_nums = np.arange(1, num_days+1)
+    if dst_end_day >= dst_start_day:
+        in_dst = (day_nums >= dst_start_day) & (day_nums < dst_end_day)
+    else:
+        in_dst = (day_nums < dst_end_day) | (day_nums >= dst_start_day)
+    return np.where(in_dst, dst_tz - std_tz, 0.0)
+
+
+# Status of every day from the cosine of its hour angle, see _hour_angle in sun_rise_set.py
+def _status_arr(cos_w):
+    return np.select([cos_w > 1, cos_w < -1], [POLAR_NIGHT, POLAR_DAY], NORMAL).astype(np.int8)
+
+
+# Core of the array engine, every location input may be a scalar or an (N, 1) column so that the
+# results broadcast to (N, num_days)
+# inputs:
+#   latitude, longitude, elevation, std_tz      see sun_rise_set()
+#   dst_correction      DST correction in hours for days 1..num_days
+#   num_days, peri_day, p_degs                  see _year_setup in sun_rise_set.py
+#   ephemeris           optional, tabulated declination and equation of time (see ephemeris.py)
+#   thresholds          optional mapping of name -> altitude in degrees, see sun_rise_set()
+# outputs:
+#   dict with one array per name in columns, status is an int8 array of NORMAL, POLAR_DAY and POLAR_NIGHT
+#   (see Record in sun_rise_set.py), the hour angle is clamped on polar days like in the scalar engine
+#   plus <name>_dawn_dec, <name>_dusk_dec and <name>_status arrays of every threshold
+def _sun_arrays(latitude, longitude, elevation, std_tz, dst_correction, num_days, peri_day, p_degs,
+                ephemeris=None, thresholds=None):
+
+    # correction for refraction
+    center_solar_disc = -0.83
+    elevation_correction = -2.076*np.sqrt(elevation/60)
+    a = np.radians(center_solar_disc + elevation_correction)
+
+    b = np.radians(latitude)
+
+    # correction for specific longitude (i.e. not being directly on the timezone meridian)
+    longitude_correction_hrs = (std_tz * 15 - longitude) / 15
+
+    # day 0 is only needed for the change columns of day 1
+    day_of_year = np.arange(0, num_days+1) + 0.5 - (longitude / 360)
+    if ephemeris is None:
+        c = _declination_arr(day_of_year)
+        eot_correction_hrs = _eot_mins_arr(day_of_year, p_degs, peri_day) / 60
+    else:
+        c = ephemeris.declination_arr(day_of_year)
+        eot_correction_hrs = ephemeris.eot_mins_arr(day_of_year) / 60
+    sin_b_sin_c = np.sin(b) * np.sin(c)
+    cos_b_cos_c = np.cos(b) * np.cos(c)
+    cos_w = (np.sin(a) - sin_b_sin_c) / cos_b_cos_c
+    w = np.arccos(np.clip(cos_w, -1, 1))
+    w_hrs = (w * 360 / (2 * pi)) / 15
+
+    solar_noon_dec_no_dst = 12 - eot_correction_hrs + longitude_correction_hrs
+    sunrise_dec_no_dst = solar_noon_dec_no_dst - w_hrs
+    sunset_dec_no_dst = solar_noon_dec_no_dst + w_hrs
+
+    solar_noon_dec = solar_noon_dec_no_dst[..., 1:] + dst_correction
+    sunrise_dec = solar_noon_dec - w_hrs[..., 1:]
+    sunset_dec = solar_noon_dec + w_hrs[..., 1:]
+
+    data = {'solar_noon_dec': solar_noon_dec,
+            'sunrise_dec': sunrise_dec,
+            'sunset_dec': sunset_dec,
+            'daylight_hours': sunset_dec - sunrise_dec,
+            'sunrise_change_mins': (sunrise_dec_no_dst[..., :-1] - sunrise_dec_no_dst[..., 1:])*60,
+            'sunset_change_mins': (sunset_dec_no_dst[..., 1:] - sunset_dec_no_dst[..., :-1])*60,
+            'status': _status_arr(cos_w[..., 1:])}
+
+    # twilights share the declination, equation of time and latitude/declination products with sunrise/sunset
+    if thresholds:
+        sin_b_sin_c = sin_b_sin_c[..., 1:]
+        cos_b_cos_c = cos_b_cos_c[..., 1:]
+        for name, altitude in thresholds.items():
+            cos_w_alt = (sin(radians(altitude)) - sin_b_sin_c) / cos_b_cos_c
+            w_alt_hrs = (np.arccos(np.clip(cos_w_alt, -1, 1)) * 360 / (2 * pi)) / 15
+            data[name + '_dawn_dec'] = solar_noon_dec - w_alt_hrs
+            data[name + '_dusk_dec'] = solar_noon_dec + w_alt_hrs
+            data[name + '_status'] = _status_arr(cos_w_alt)
+    return data
+
+
+# Sunrise Sunset Data as arrays, one element per day of the year, same inputs as sun_rise_set()
+#   use_ephemeris       interpolate declination and equation of time from the cached per-year table
+#                       (see ephemeris.py for the error bound)
+#   thresholds          optional mapping of name -> altitude in degrees, see sun_rise_set()
+# outputs:
+#   dict with 'year', 'day_ord' (range of date ordinals, see Record) and one array per name in columns
+#   and per twilight column of thresholds
+#   if numpy is not installed the scalar engine is used and the columns are lists
+def sun_rise_set_arrays(latitude, longitude, elevation, peri_date, sols_date, std_tz, dst_tz=999,
+                        dst_start_date='', dst_end_date='', dst_rule=None, use_ephemeris=False, thresholds=None):
+
+    year, num_days, peri_day, p_degs = _year_setup(peri_date, sols_date)
+    first_ord = date(year, 1, 1).toordinal()
+
+    ephemeris = get_ephemeris(peri_date, sols_date) if use_ephemeris else None
+
+    if np is None:
+        results = sun_rise_set(latitude, longitude, elevation, peri_date, sols_date, std_tz, dst_tz,
+                               dst_start_date, dst_end_date, dst_rule, ephemeris, thresholds=thresholds)
+        data = dict((name, [getattr(r, name) for r in results])
+                    for name in columns + _threshold_columns(thresholds))
+    else:
+        dst_correction = _dst_correction_arr(num_days, std_tz, *_dst_setup(year, std_tz, dst_tz, dst_start_date,
+                                                                           dst_end_date, dst_rule))
+        data = _sun_arrays(latitude, longitude, elevation, std_tz, dst_correction, num_days, peri_day, p_degs,
+                           ephemeris, thresholds)
+
+    data['year'] = year
+    data['day_ord'] = range(first_ord, first_ord + num_days)
+    return data
+
+
+# Sunrise Sunset Data for many locations sharing one year
+# inputs:
+#   locations           sequence of (latitude, longitude, elevation, std_tz[, dst_tz, dst_start_date, dst_end_date])
+#                       or (latitude, longitude, elevation, std_tz, dst_rule) tuples, see sun_rise_set() for the
+#                       meaning of each field
+#   peri_date           date of perihelion in London YYYYMMDD HH:MM'
+#   sols_date           date of previous solstice in London YYYYMMDD HH:MM'
+#   use_ephemeris       interpolate declination and equation of time from the cached per-year table
+#   thresholds          optional mapping of name -> altitude in degrees, see sun_rise_set()
+# outputs:
+#   dict with 'year', 'day_ord' (range of date ordinals, see Record) and one (location x day) array per name
+#   in columns and per twilight column of thresholds
+#   if numpy is not installed the columns are lists of per-location lists
+def sun_rise_set_batch(locations, peri_date, sols_date, use_ephemeris=False, thresholds=None):
+
+    year, num_days, peri_day, p_degs = _year_setup(peri_date, sols_date)
+    first_ord = date(year, 1, 1).toordinal()
+
+    ephemeris = get_ephemeris(peri_date, sols_date) if use_ephemeris else None
+
+    if np is None:
+        names = columns + _threshold_columns(thresholds)
+        data = dict((name, []) for name in names)
+        for loc in locations:
+            results = sun_rise_set(loc[0], loc[1], loc[2], peri_date, sols_date, loc[3], *_dst_args(loc),
+                                   ephemeris=ephemeris, thresholds=thresholds)
+            for name in names:
+                data[name].append([getattr(r, name) for r in results])
+    else:
+        latitude = np.array([loc[0] for loc in locations], dtype=float)[:, None]
+        longitude = np.array([loc[1] for loc in locations], dtype=float)[:, None]
+        elevation = np.array([loc[2] for loc in locations], dtype=float)[:, None]
+        std_tz = np.array([loc[3] for loc in locations], dtype=float)[:, None]
+
+        # locations in the same region share their DST rows, the DST window is only worked out once per region
+        dst_correction = np.zeros((len(locations), num_days))
+        dst_rows = {}
+        for i, loc in enumerate(locations):
+            if len(loc) < 5:
+                continue
+            dst_key = (loc[3],) + _dst_args(loc)
+            if dst_key not in dst_rows:
+                dst_tz, dst_days = _dst_setup(year, *dst_key)
+                dst_rows[dst_key] = _dst_correction_arr(num_days, loc[3], dst_tz, dst_days)
+            dst_correction[i] = dst_rows[dst_key]
+
+        data = _sun_arrays(latitude, longitude, elevation, std_tz, dst_correction, num_days, peri_day, p_degs,
+                           ephemeris, thresholds)
+
+    data['year'] = year
+    data['day_ord'] = range(first_ord, first_ord + num_days)
+    return data
+
+
+# dst_tz, dst_start_date, dst_end_date, dst_rule of a sun_rise_set_batch() location
+def _dst_args(loc):
+    if len(loc) == 5 and isinstance(loc[4], str):
+        return 999, '', '', loc[4]
+    dst = tuple(loc[4:7])
+    return dst + (999, '', '')[len(dst):] + (None,)
+
+
+# Drop-in replacement for sun_rise_set() backed by sun_rise_set_arrays()
+# outputs:
+#   SunTable            indexing and iterating give Records, see Record object
+def sun_rise_set_vec(latitude, longitude, elevation, peri_date, sols_date, std_tz, dst_tz=999,
+                     dst_start_date='', dst_end_date='', dst_rule=None, thresholds=None):
+    if np is None:
+        return sun_rise_set(latitude, longitude, elevation, peri_date, sols_date, std_tz, dst_tz,
+                            dst_start_date, dst_end_date, dst_rule, thresholds=thresholds)
+
+    data = sun_rise_set_arrays(latitude, longitude, elevation, peri_date, sols_date, std_tz, dst_tz,
+                               dst_start_date, dst_end_date, dst_rule, thresholds=thresholds)
+    cols = dict((name, data[name].tolist()) for name in columns)
+    table = SunTable.from_columns(day_ord=data['day_ord'], **cols)
+    for name in _threshold_columns(thresholds):
+        table.add_column(name, 'b' if name.endswith('_status') else 'd').extend(data[name].tolist())
+    return table
+
+
+# Converts an array of decimal times to clock times, same output as calling dec_to_clk on every value
+# The hours, minutes and seconds are split with array arithmetic and each distinct second is formatted once.
+# inputs:
+#   decimal times
+# outputs:
+#   list of clock times
+def dec_to_clk_arr(times_dec, format_12_24=24, secs_on=True, fixed_width=True):
+    if np is None:
+        return dec_to_clk_list(times_dec, format_12_24, secs_on, fixed_width)
+
+    times_dec = np.asarray(times_dec, dtype=float)
+    frac_mins = times_dec % 1 * 60
+    int_hours = np.trunc(times_dec).astype(np.int64)
+    int_mins = np.trunc(frac_mins).astype(np.int64)
+    int_secs = np.trunc(frac_mins % 1 * 60).astype(np.int64)
+    keys, inverse = np.unique(int_hours*3600 + int_mins*60 + int_secs, return_inverse=True)
+    clk = np.array([_clk_from_parts(key // 3600, key % 3600 // 60, key % 60, format_12_24, secs_on, fixed_width)
+                    for key in keys.tolist()], dtype=object)
+    return clk[inverse.ravel()].tolist()
@@ -0,0 +1,194 @@
+from __future__ import division
+import argparse
+import timeit
+from datetime import date
+from functools import lru_cache
+from math import pi, radians, degrees, sin, asin, cos, tan, sqrt
+from sun_rise_set import (sun_rise_set, _declination, _eot_mins, _horizon_rads, _year_setup, e, orb_per,
+                          axis_norm_degs, NORMAL)
+from sun_epochs import year_dates
+
+# Declination / equation of time / refraction models for sun_rise_set(), passed as its ephemeris argument
+#
+#   fast        low-order truncation of the default model: a two-term series instead of the arcsine of the
+#               declination and only the first two terms of the equation of time series, within about 2 minutes
+#               of precise below 60 degrees of latitude
+#   muller      the default model of sun_rise_set.py (declination [1], equation of time [2], refraction [3])
+#   precise     NOAA solar calculator formulas (Meeus, Astronomical Algorithms): mean longitude and anomaly,
+#               equation of center, nutation and aberration of the apparent longitude, corrected obliquity
+#
+# The day_of_year argument of every model counts days from Jan 1 00:00 UT, Jan 1 00:00 is day 1.
+#
+# example, max/mean error against precise and days computed per second of every model
+# -year 2020 -sites 50 -repeat 3
+
+# minutes per radian of hour angle
+time_mins = (24*60) / (2*pi)
+
+
+class MullerModel(object):
+    """ Default model of sun_rise_set.py """
+    __slots__ = ['_peri_day', '_p_degs']
+
+    # inputs:
+    #   year_params         (year, num_days, peri_day, p_degs), see _year_setup in sun_rise_set.py
+    def __init__(self, year_params):
+        self._peri_day = year_params[2]
+        self._p_degs = year_params[3]
+
+    # declination in radians, see _declination in sun_rise_set.py
+    def declination(self, day_of_year):
+        return _declination(day_of_year)
+
+    # equation of time in minutes, see _eot_mins in sun_rise_set.py
+    def eot_mins(self, day_of_year):
+        return _eot_mins(day_of_year, self._p_degs, self._peri_day)
+
+    # altitude of the center of the sun at sunrise/sunset in radians, see _horizon_rads in sun_rise_set.py
+    def horizon_rads(self, elevation):
+        return _horizon_rads(elevation)
+
+
+class FastModel(MullerModel):
+    """ Default model cut down to its largest terms, the constants are worked out once per year """
+    __slots__ = ['_sin_axis', '_ratio360', '_ratio_pi_e', '_tan2', '_p']
+
+    def __init__(self, year_params):
+        MullerModel.__init__(self, year_params)
+        axis_norm_rads = radians(axis_norm_degs)
+        self._sin_axis = sin(axis_norm_rads)
+        self._ratio360 = radians(360/orb_per)
+        self._ratio_pi_e = radians((360/pi)*e)
+        t1 = (axis_norm_rads/2)*(1 - 4*e*e)
+        self._tan2 = (1 - cos(2*t1)) / (1 + cos(2*t1))
+        self._p = radians(self._p_degs)
+
+    # declination, the arcsine of the default formula replaced by the first two terms of its series
+    def declination(self, day_of_year):
+        d_offset = day_of_year - 1
+        z = self._sin_axis * cos(self._ratio360*(d_offset+10) + self._ratio_pi_e*sin(self._ratio360*(d_offset-2)))
+        return -(z + z*z*z/6)
+
+    # equation of time, obliquity and eccentricity terms of the series only
+    def eot_mins(self, day_of_year):
+        m = 2*pi*((day_of_year - self._peri_day)/orb_per)
+        return -(self._tan2*sin(2*(m + self._p)) + 2*e*sin(m))*time_mins
+
+
+class PreciseModel(object):
+    """ NOAA solar calculator model, only needs the year """
+    __slots__ = ['_jd_jan0']
+
+    def __init__(self, year_params):
+        # Julian date of Dec 31 00:00 UT of the previous year, i.e. day_of_year 0
+        self._jd_jan0 = date(year_params[0], 1, 1).toordinal() + 1721424.5 - 1
+
+    # apparent longitude, corrected obliquity, mean longitude, mean anomaly (radians) and eccentricity
+    def _terms(self, day_of_year):
+        t = (self._jd_jan0 + day_of_year - 2451545) / 36525
+        mean_long = radians((280.46646 + t*(36000.76983 + t*0.0003032)) % 360)
+        mean_anom = radians(357.52911 + t*(35999.05029 - 0.0001537*t))
+        ecc = 0.016708634 - t*(0.000042037 + 0.0000001267*t)
+        center = (sin(mean_anom)*(1.914602 - t*(0.004817 + 0.000014*t)) + sin(2*mean_anom)*(0.019993 - 0.000101*t) +
+                  sin(3*mean_anom)*0.000289)
+        omega = radians(125.04 - 1934.136*t)
+        app_long = radians(degrees(mean_long) + center - 0.00569 - 0.00478*sin(omega))
+        mean_obliq = 23 + (26 + (21.448 - t*(46.815 + t*(0.00059 - t*0.001813)))/60)/60
+        obliq = radians(mean_obliq + 0.00256*cos(omega))
+        return app_long, obliq, mean_long, mean_anom, ecc
+
+    def declination(self, day_of_year):
+        app_long, obliq, _, _, _ = self._terms(day_of_year)
+        return asin(sin(obliq)*sin(app_long))
+
+    def eot_mins(self, day_of_year):
+        _, obliq, mean_long, mean_anom, ecc = self._terms(day_of_year)
+        y = tan(obliq/2)**2
+        return 4*degrees(y*sin(2*mean_long) - 2*ecc*sin(mean_anom) + 4*ecc*y*sin(mean_anom)*cos(2*mean_long) -
+                         0.5*y*y*sin(4*mean_long) - 1.25*ecc*ecc*sin(2*mean_anom))
+
+    # -0.833 degrees of refraction and solar radius, plus the dip of the sea horizon (1.76 arcmin * sqrt(meters),
+    # refraction included).  The default model dips by 2.076 * sqrt(elevation/60) degrees, see _horizon_rads
+    def horizon_rads(self, elevation):
+        return radians(-0.833 - (1.76/60)*sqrt(elevation))
+
+
+backends = {'fast': FastModel, 'muller': MullerModel, 'precise': PreciseModel}
+
+
+# Cached model of a year
+# inputs:
+#   name                one of backends
+#   peri_date           date of perihelion in London YYYYMMDD HH:MM'
+#   sols_date           date of previous solstice in London YYYYMMDD HH:MM'
+# outputs:
+#   model, pass it as the ephemeris argument of sun_rise_set()
+@lru_cache(maxsize=16)
+def get_backend(name, peri_date, sols_date):
+    if name not in backends:
+        raise ValueError('unknown backend: {0}, expected one of {1}'.format(name, ', '.join(sorted(backends))))
+    return backends[name](_year_setup(peri_date, sols_date))
+
+
+# sites spread over latitudes -60..60 and all longitudes, at sea level and on their timezone meridian
+def _sites(n):
+    sites = []
+    for i in range(n):
+        longitude = -180 + 360*((i*7919) % n)/n
+        sites.append((-60 + 120*i/max(n - 1, 1), longitude, 0, round(longitude/15)))
+    return sites
+
+
+# Error and throughput of every backend
+# inputs:
+#   year                1900 to 2100, the perihelion/solstice dates come from sun_epochs.py
+#   num_sites           number of sites, see _sites
+#   names               backends to compare, None for all
+#   reference           backend the errors are taken against
+#   repeat              the throughput is the best of repeat runs over all sites
+# outputs:
+#   list of dicts with 'backend', 'max_err_mins' and 'mean_err_mins' (absolute sunrise, sunset and solar noon
+#   differences, days that are NORMAL in both), 'days_per_sec'
+def compare_backends(year=2020, num_sites=50, names=None, reference='precise', repeat=3):
+    peri_date, sols_date = year_dates(year)
+    sites = _sites(num_sites)
+
+    def run(model):
+        return [sun_rise_set(lat, lon, elev, peri_date, sols_date, tz, ephemeris=model)
+                for lat, lon, elev, tz in sites]
+
+    ref_tables = run(get_backend(reference, peri_date, sols_date))
+    rows = []
+    for name in names or sorted(backends):
+        model = get_backend(name, peri_date, sols_date)
+        tables = run(model)
+        max_err = total = 0.0
+        count = 0
+        for table, ref_table in zip(tables, ref_tables):
+            for field in ('sunrise_dec', 'sunset_dec', 'solar_noon_dec'):
+                for value, ref_value, status, ref_status in zip(table.column(field), ref_table.column(field),
+                                                                table.column('status'), ref_table.column('status')):
+                    if status == NORMAL and ref_status == NORMAL:
+                        err = abs(value - ref_value)*60
+                        max_err = max(max_err, err)
+                        total += err
+                        count += 1
+        seconds = min(timeit.repeat(lambda: run(model), number=1, repeat=repeat))
+        rows.append({'backend': name, 'max_err_mins': max_err, 'mean_err_mins': total/count if count else 0.0,
+                     'days_per_sec': sum(len(table) for table in tables)/seconds})
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-year', '--year', help='year 1900-2100', type=int, default=2020)
+    parser.add_argument('-sites', '--sites', help='number of sites', type=int, default=50)
+    parser.add_argument('-reference', '--reference', help='backend the errors are taken against',
+                        choices=sorted(backends), default='precise')
+    parser.add_argument('-repeat', '--repeat', help='timing runs per backend, the best one counts', type=int,
+                        default=3)
+    args = parser.parse_args()
+
+    print('{0:<10} {1:>14} {2:>14} {3:>14}'.format('backend', 'max err min', 'mean err min', 'days/sec'))
+    for row in compare_backends(args.year, args.sites, reference=args.reference, repeat=args.repeat):
+        print('{backend:<10} {max_err_mins:>14.4f} {mean_err_mins:>14.4f} {days_per_sec:>14.0f}'.format(**row))
@@ -0,0 +1,131 @@
+import sqlite3
+import time
+from collections import OrderedDict
+from sun_rise_set import sun_rise_set, SunTable
+
+
+# Latitude and longitude are rounded to `precision` decimals and the elevation to `elevation_precision`
+# decimals before computing, so every location that rounds to the same key shares one result.
+# The SQLite file keeps at most max_entries results (least recently used are evicted first) and the
+# in-process LRU keeps memory_entries.  The tables returned are shared between callers, do not modify them.
+# New rows and last_used times are committed every commit_every misses, when rows are evicted and on close(),
+# so other processes sharing the file only see the results of this one after that.
+class SunCache(object):
+    """ Opt-in persistent cache of sun_rise_set() results, an in-process LRU in front of a SQLite file """
+
+    def __init__(self, path, precision=3, elevation_precision=0, max_entries=100000, memory_entries=256,
+                 commit_every=64):
+        self._precision = precision
+        self._elevation_precision = elevation_precision
+        self._max_entries = max_entries
+        self._memory_entries = memory_entries
+        self._commit_every = commit_every
+        self._memory = OrderedDict()
+        self._touched = {}      # key -> time of the hits not written to last_used yet, see _flush_touched
+        self._uncommitted = 0   # rows inserted since the last commit
+        self.hits = 0           # served from the in-process LRU
+        self.disk_hits = 0      # served from the SQLite file
+        self.misses = 0         # computed
+        self._db = sqlite3.connect(path)
+        self._db.execute('CREATE TABLE IF NOT EXISTS results '
+                         '(key TEXT PRIMARY KEY, data BLOB NOT NULL, last_used REAL NOT NULL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+        self._db.commit()
+        self._disk_entries = self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def close(self):
+        self.commit()
+        self._db.close()
+
+    # writes the pending last_used times and commits the new rows
+    def commit(self):
+        self._flush_touched()
+        self._db.commit()
+        self._uncommitted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self):
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                'memory_entries': len(self._memory),
+                'disk_entries': self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]}
+
+    # same inputs and output as sun_rise_set() in sun_rise_set.py
+    def sun_rise_set(self, latitude, longitude, elevation, peri_date, sols_date, std_tz, dst_tz=999,
+                     dst_start_date='', dst_end_date='', dst_rule=None):
+        latitude = round(latitude, self._precision)
+        longitude = round(longitude, self._precision)
+        elevation = round(elevation, self._elevation_precision)
+        key = '|'.join(repr(x) for x in (blob_version, latitude, longitude, elevation, peri_date, sols_date,
+                                         float(std_tz), float(dst_tz), dst_start_date, dst_end_date, dst_rule))
+
+        table = self._memory.get(key)
+        if table is not None:
+            self._memory.move_to_end(key)
+            self._touched[key] = time.time()
+            self.hits += 1
+            return table
+
+        row = self._db.execute('SELECT data FROM results WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            self.disk_hits += 1
+            table = _from_blob(row[0])
+            self._touched[key] = time.time()
+        else:
+            self.misses += 1
+            table = sun_rise_set(latitude, longitude, elevation, peri_date, sols_date, std_tz, dst_tz,
+                                 dst_start_date, dst_end_date, dst_rule)
+            self._db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)', (key, _to_blob(table), time.time()))
+            self._disk_entries += 1
+            self._uncommitted += 1
+            if self._disk_entries > self._max_entries:
+                self._evict()
+            elif self._uncommitted >= self._commit_every:
+                self.commit()
+
+        self._memory[key] = table
+        if len(self._memory) > self._memory_entries:
+            self._memory.popitem(last=False)
+        return table
+
+    # writes the last_used times of memory and disk hits in one statement, see commit
+    def _flush_touched(self):
+        if self._touched:
+            self._db.executemany('UPDATE results SET last_used = ? WHERE key = ?',
+                                 [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    # drops the least recently used rows once the file holds more than max_entries results
+    def _evict(self):
+        self._flush_touched()
+        count = self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        if count > self._max_entries:
+            self._db.execute('DELETE FROM results WHERE key IN '
+                             '(SELECT key FROM results ORDER BY last_used LIMIT ?)', (count - self._max_entries,))
+        self._disk_entries = min(count, self._max_entries)
+        self.commit()
+
+
+# SunTable columns, one after the other, as raw machine values
+# keys start with blob_version, so results stored with other columns are never read back
+blob_version = 2
+
+
+def _to_blob(table):
+    return b''.join(table.column(name).tobytes() for name in SunTable.columns)
+
+
+def _from_blob(blob):
+    table = SunTable()
+    offset = 0
+    cols = [table.column(name) for name in SunTable.columns]
+    num_days = len(blob) // sum(col.itemsize for col in cols)
+    for col in cols:
+        size = num_days * col.itemsize
+        col.frombytes(blob[offset:offset + size])
+        offset += size
+    return table
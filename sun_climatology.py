@@ -0,0 +1,195 @@
+from __future__ import division
+import argparse
+import csv
+import os
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from math import sqrt
+from sun_epochs import sun_rise_set_year, first_year, last_year
+from dst_rules import rule_years
+
+# Per day of the year statistics (mean, min, max, standard deviation) over many years
+#
+# Every year is computed with sun_rise_set_year() and folded into running (Welford) accumulators, then dropped,
+# so memory does not depend on the number of years.  Days are keyed by calendar date: slot 0 is Jan 1 and slot
+# 59 is Feb 29, which only leap years contribute to, so Mar 1 is always slot 60 whether or not the year is a
+# leap year.  Partial states of disjoint year ranges can be merged, which is how the years are spread across
+# worker processes.
+#
+# Polar day/night days (see Record.status) contribute their clamped sunrise/sunset times.
+#
+# example
+# -lat 40.716 -long -74.017 -elev 0 -std_tz -5 -dst_rule US -first_year 1990 -last_year 2089 -workers 4
+#
+# without -first_year/-last_year every year of the built-in table that the DST rule covers is used
+
+num_slots = 366
+fields = ['sunrise_dec', 'sunset_dec', 'daylight_hours']
+
+
+# calendar date slot of every day of a year, see above
+def _slots(year):
+    if date(year, 12, 31).timetuple().tm_yday == 366:
+        return range(num_slots)
+    return list(range(59)) + list(range(60, num_slots))
+
+
+class Climatology(object):
+    """ Running per-slot count, mean, sum of squared deviations, min and max of every field """
+
+    def __init__(self):
+        self.count = array('l', [0] * num_slots)
+        self.years = 0
+        self._mean = dict((name, array('d', [0.0] * num_slots)) for name in fields)
+        self._m2 = dict((name, array('d', [0.0] * num_slots)) for name in fields)
+        self._min = dict((name, array('d', [float('inf')] * num_slots)) for name in fields)
+        self._max = dict((name, array('d', [float('-inf')] * num_slots)) for name in fields)
+
+    # Folds one year into the statistics
+    # inputs:
+    #   year                the year of the results
+    #   results             SunTable of the whole year, see sun_rise_set()
+    def add_year(self, year, results):
+        slots = _slots(year)
+        count = self.count
+        for slot in slots:
+            count[slot] += 1
+        for name in fields:
+            mean = self._mean[name]
+            m2 = self._m2[name]
+            low = self._min[name]
+            high = self._max[name]
+            for slot, value in zip(slots, results.column(name)):
+                delta = value - mean[slot]
+                mean[slot] += delta / count[slot]
+                m2[slot] += delta * (value - mean[slot])
+                if value < low[slot]:
+                    low[slot] = value
+                if value > high[slot]:
+                    high[slot] = value
+        self.years += 1
+
+    # Adds the statistics of another, disjoint, set of years (Chan et al. parallel update)
+    def merge(self, other):
+        for name in fields:
+            mean, m2, low, high = self._mean[name], self._m2[name], self._min[name], self._max[name]
+            o_mean, o_m2, o_low, o_high = other._mean[name], other._m2[name], other._min[name], other._max[name]
+            for slot in range(num_slots):
+                n_a = self.count[slot]
+                n_b = other.count[slot]
+                if n_b == 0:
+                    continue
+                n = n_a + n_b
+                delta = o_mean[slot] - mean[slot]
+                mean[slot] += delta * n_b / n
+                m2[slot] += o_m2[slot] + delta * delta * n_a * n_b / n
+                low[slot] = min(low[slot], o_low[slot])
+                high[slot] = max(high[slot], o_high[slot])
+        for slot in range(num_slots):
+            self.count[slot] += other.count[slot]
+        self.years += other.years
+        return self
+
+    # Statistics of every slot
+    # outputs:
+    #   list of dicts with 'month', 'day', 'years' (number of values) and <field>_mean, <field>_min,
+    #   <field>_max and <field>_std (sample standard deviation, 0 with fewer than two values) for every field
+    def rows(self):
+        rows = []
+        first = date(2000, 1, 1).toordinal()
+        for slot in range(num_slots):
+            n = self.count[slot]
+            if n == 0:
+                continue
+            day = date.fromordinal(first + slot)
+            row = {'month': day.month, 'day': day.day, 'years': n}
+            for name in fields:
+                row[name + '_mean'] = self._mean[name][slot]
+                row[name + '_min'] = self._min[name][slot]
+                row[name + '_max'] = self._max[name][slot]
+                row[name + '_std'] = sqrt(self._m2[name][slot] / (n - 1)) if n > 1 else 0.0
+            rows.append(row)
+        return rows
+
+
+# Years of the built-in perihelion/solstice table (see sun_epochs.py) that a DST rule covers
+# inputs:
+#   dst_rule            DST region of dst_rules.py, None for no DST
+# outputs:
+#   first year, last year
+def year_range(dst_rule=None):
+    if dst_rule is None:
+        return first_year, last_year
+    rule_first, rule_last = rule_years(dst_rule)
+    return max(first_year, rule_first), last_year if rule_last is None else min(last_year, rule_last)
+
+
+# Worker, runs in a child process for a block of consecutive years
+def _climatology_years(args, years):
+    clim = Climatology()
+    for year in years:
+        clim.add_year(year, sun_rise_set_year(year, *args))
+    return clim
+
+
+# Per day of the year statistics of one location
+# inputs:
+#   latitude, longitude, elevation, std_tz, dst_tz      see sun_rise_set()
+#   dst_rule            DST region of dst_rules.py (literal DST dates only cover one year), None for no DST
+#   start_year          first year, the perihelion/solstice dates come from sun_epochs.py
+#   end_year            last year (inclusive), the years must be in year_range(dst_rule) (ValueError otherwise)
+#   workers             None or 1 to compute in this process, otherwise the number of worker processes
+# outputs:
+#   Climatology
+def climatology(latitude, longitude, elevation, std_tz, start_year, end_year, dst_tz=999, dst_rule=None,
+                workers=None):
+    range_first, range_last = year_range(dst_rule)
+    if start_year > end_year:
+        raise ValueError('first year {0} is after last year {1}'.format(start_year, end_year))
+    if start_year < range_first or end_year > range_last:
+        raise ValueError('years {0}-{1} are outside {2}-{3}, the years covered by the perihelion/solstice table{4}'
+                         .format(start_year, end_year, range_first, range_last,
+                                 '' if dst_rule is None else ' and the DST rule ' + dst_rule))
+
+    args = (latitude, longitude, elevation, std_tz, dst_tz, '', '', dst_rule)
+    years = range(start_year, end_year + 1)
+    if workers is None or workers <= 1:
+        return _climatology_years(args, years)
+
+    block = -(-len(years) // workers)
+    blocks = [years[i:i + block] for i in range(0, len(years), block)]
+    clim = Climatology()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for part in executor.map(_climatology_years, [args] * len(blocks), blocks):
+            clim.merge(part)
+    return clim
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-lat', '--latitude', help='latitude as a decimal value', type=float, required=True)
+    parser.add_argument('-long', '--longitude', help='longitude as a decimal value', type=float, required=True)
+    parser.add_argument('-elev', '--elevation', help='elevation in meters', type=float, default=0)
+    parser.add_argument('-std_tz', '--std_tz', help='Standard Timezone', type=float, required=True)
+    parser.add_argument('-dst_rule', '--dst_rule', help='DST region, see dst_rules.py', default=None)
+    parser.add_argument('-first_year', '--first_year', help='first year, default the first one covered',
+                        type=int, default=None)
+    parser.add_argument('-last_year', '--last_year', help='last year, default the last one covered', type=int,
+                        default=None)
+    parser.add_argument('-workers', '--workers', help='worker processes, default one per CPU core', type=int,
+                        default=os.cpu_count())
+    args = parser.parse_args()
+
+    try:
+        default_first, default_last = year_range(args.dst_rule)
+        rows = climatology(args.latitude, args.longitude, args.elevation, args.std_tz,
+                           default_first if args.first_year is None else args.first_year,
+                           default_last if args.last_year is None else args.last_year,
+                           dst_rule=args.dst_rule, workers=args.workers).rows()
+    except ValueError as err:
+        parser.error(str(err))
+    writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]), lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(rows)
@@ -0,0 +1,93 @@
+from datetime import datetime
+from sun_rise_set import _sun_rise_set, _year_setup_dt
+
+# Perihelion and previous December solstice for the years 1900 to 2100, London time (UT)
+#
+# One 8 digit entry per year, starting with 1900: PPPPSSSS where
+#   PPPP    minutes from Jan 1 00:00 to the perihelion of the year
+#   SSSS    minutes from Dec 20 00:00 of the previous year to the December solstice
+#
+# Generated with make_epochs.py (perihelion from the SOFA/ERFA Earth ephemeris, solstice from Meeus
+# "Astronomical Algorithms" ch. 27, both within about a minute of the published times), which also checks the
+# table against published times of a few years (python make_epochs.py -check).
+first_year = 1900
+last_year = 2100
+_table = (
+    '18252936 26593282 04443637 43633996 31364340 02673254 38753604 18883953 28224312 32213214 '
+    '06533561 37833912 35244254 01413165 41313515 25243863 22004216 35363119 10193466 33843821 '
+    '41874167 02703077 38973428 28423777 15544134 38213045 16563397 29753754 47294099 04793004 '
+    '36213353 35183699 16414050 40122954 20113298 18933649 49113997 08552907 33623262 42113614 '
+    '17663966 39702875 25953225 17153579 53763929 13652835 25123184 44853533 17503883 36902794 '
+    '32573143 16713493 55613840 18372744 19393092 50613444 22433791 32702700 36843049 14573400 '
+    '54523755 24472666 17283020 54963375 26843722 25972630 42472981 17953328 54023677 29462580 '
+    '12692924 54313276 31343624 21602533 49002888 22153236 49853586 34742495 13982843 56753201 '
+    '37643550 15412456 49992811 23563158 41993510 40732423 17342768 57023122 43183466 13122368 '
+    '53632722 30593067 37833414 45042323 17942666 49863023 47653377 13962286 55952647 36602997 '
+    '31983344 48522258 22892602 46222955 53823304 14752202 52502555 40632902 28713248 52502164 '
+    '28892507 39922858 57923210 17182112 50392471 47162823 28093168 51782084 32152428 32002782 '
+    '62283139 22712043 47352399 52972748 29193088 51282000 39152343 30332690 65083042 25331940 '
+    '34922294 55682649 31912996 50311916 46072266 29342614 66172971 31201873 31812228 61612582 '
+    '35732921 41921833 48672178 27752524 65322881 37761784 29372135 64642488 39652827 35071742 '
+    '54952092 32112438 63182794 42181697 25192049 65042409 45442756 30701671 60002022 35242365 '
+    '56962718 47731621 27151969 65812322 50342661 23501568 61051920 39052265 51882623 54251532 '
+    '30501882 63442239 55812584 23211496 64441850 44532195 42922547 55721453 31421801 57742158 '
+    '62342504 25761412 65911762 50072104 38882453 60321361 38011709 53172062 66582409 24601316 '
+    '60441672 54812024 38082378 63751291 43361640 45551993 70752340 29311246 59121597 61371940 '
+    '37132284 '
+)
+
+# year -> (perihelion datetime, solstice datetime), filled in on first use
+_epochs = None
+
+
+def _load():
+    global _epochs
+    if _epochs is None:
+        epochs = {}
+        for i, entry in enumerate(_table.split()):
+            year = first_year + i
+            peri_mins = int(entry[:4])
+            sols_mins = int(entry[4:])
+            epochs[year] = (datetime(year, 1, 1 + peri_mins // 1440, peri_mins % 1440 // 60, peri_mins % 60),
+                            datetime(year - 1, 12, 20 + sols_mins // 1440, sols_mins % 1440 // 60, sols_mins % 60))
+        _epochs = epochs
+    return _epochs
+
+
+def _epoch(year):
+    epochs = _load()
+    if year not in epochs:
+        raise ValueError('no perihelion/solstice data for {0}, the table covers {1}-{2}'.format(
+            year, first_year, last_year))
+    return epochs[year]
+
+
+# Perihelion and previous solstice of a year, in the format sun_rise_set() takes
+# inputs:
+#   year                1900 to 2100
+# outputs:
+#   peri_date, sols_date    YYYYMMDD HH:MM strings
+def year_dates(year):
+    peri_datetime, sols_datetime = _epoch(year)
+    return peri_datetime.strftime('%Y%m%d %H:%M'), sols_datetime.strftime('%Y%m%d %H:%M')
+
+
+# Year setup without any string parsing, same output as _year_setup(*year_dates(year)) in sun_rise_set.py
+# inputs:
+#   year                1900 to 2100
+# outputs:
+#   year, number of days in the year, peri_day and p_degs
+def year_params(year):
+    return _year_setup_dt(*_epoch(year))
+
+
+# Sunrise Sunset Data for a year, with the perihelion and solstice taken from the built-in table
+# inputs:
+#   year                1900 to 2100
+#   other inputs        see sun_rise_set() in sun_rise_set.py
+# outputs:
+#   SunTable            indexing and iterating give Records, see Record object
+def sun_rise_set_year(year, latitude, longitude, elevation, std_tz, dst_tz=999, dst_start_date='', dst_end_date='',
+                      dst_rule=None, ephemeris=None, stats=None, thresholds=None):
+    return _sun_rise_set(year_params(year), latitude, longitude, elevation, std_tz, dst_tz, dst_start_date,
+                         dst_end_date, dst_rule, ephemeris, stats, thresholds)
@@ -0,0 +1,145 @@
+from __future__ import division
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+from sun_rise_set import sun_rise_set, _year_setup, NORMAL
+
+try:
+    import numpy as np
+    from sun_arrays import sun_rise_set_batch
+except ImportError:  # numpy is optional, the grid is built with sun_rise_set() and read with mmap
+    np = None
+
+# Precomputed sunrise/sunset grid, one flat binary file per year and UTC offset
+#
+# layout (little endian):
+#   header      magic b'SUNGRID1', then <iiiidddd>: year, num_days, num_lat, num_lon,
+#               lat0, lon0, resolution, utc_offset
+#   data        float32 values, indexed [lat][lon][day][sunrise, sunset] (decimal hours at utc_offset)
+#               so the whole year of one grid node is contiguous
+#
+# Nodes where the sun does not rise or set (polar day/night) hold NaN.
+
+magic = b'SUNGRID1'
+_header = struct.Struct('<8siiiidddd')
+
+
+# Builds the grid file
+# inputs:
+#   path                output file
+#   peri_date           date of perihelion in London YYYYMMDD HH:MM'
+#   sols_date           date of previous solstice in London YYYYMMDD HH:MM'
+#   utc_offset          timezone of the stored times, no DST
+#   resolution          grid spacing in degrees
+#   lat_range           (south, north) edges of the grid in degrees
+#   lon_range           (west, east) edges of the grid in degrees
+def build_grid(path, peri_date, sols_date, utc_offset=0, resolution=1.0, lat_range=(-60, 60),
+               lon_range=(-180, 180)):
+    num_lat = int(round((lat_range[1] - lat_range[0]) / resolution)) + 1
+    num_lon = int(round((lon_range[1] - lon_range[0]) / resolution)) + 1
+    lats = [lat_range[0] + i*resolution for i in range(num_lat)]
+    lons = [lon_range[0] + i*resolution for i in range(num_lon)]
+
+    year, num_days = _year_setup(peri_date, sols_date)[:2]
+    with open(path, 'wb') as f:
+        f.write(_header.pack(magic, year, num_days, num_lat, num_lon, lats[0], lons[0], resolution, utc_offset))
+        for lat in lats:
+            if np is not None:
+                data = sun_rise_set_batch([(lat, lon, 0, utc_offset) for lon in lons], peri_date, sols_date)
+                row = np.stack([data['sunrise_dec'], data['sunset_dec']], axis=-1).astype('<f4')
+                row[data['status'] != NORMAL] = np.nan
+                body = row.tobytes()
+            else:
+                row = array('f')
+                for lon in lons:
+                    for i in sun_rise_set(lat, lon, 0, peri_date, sols_date, utc_offset):
+                        if i.status == NORMAL:
+                            row.append(i.sunrise_dec)
+                            row.append(i.sunset_dec)
+                        else:
+                            row.extend([float('nan')] * 2)
+                if sys.byteorder != 'little':
+                    row.byteswap()
+                body = row.tobytes()
+            f.write(body)
+
+
+class SunGrid(object):
+    """ Read-only view of a grid file, the data is memory-mapped and never copied """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (file_magic, self.year, self.num_days, self.num_lat, self.num_lon, self.lat0, self.lon0,
+         self.resolution, self.utc_offset) = _header.unpack_from(self._mmap, 0)
+        if file_magic != magic:
+            raise ValueError('not a sunrise/sunset grid file: ' + path)
+        shape = (self.num_lat, self.num_lon, self.num_days, 2)
+        if np is not None:
+            self._data = np.frombuffer(self._mmap, dtype='<f4', offset=_header.size).reshape(shape)
+        else:  # native float32, the file is little endian
+            self._data = memoryview(self._mmap)[_header.size:].cast('f')
+
+    def close(self):
+        self._data = None
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _node(self, i_lat, i_lon, day_num):
+        if np is not None:
+            return self._data[i_lat, i_lon, day_num - 1]
+        pos = ((i_lat * self.num_lon + i_lon) * self.num_days + day_num - 1) * 2
+        return self._data[pos], self._data[pos + 1]
+
+    # Bilinear interpolation of sunrise/sunset between the four surrounding grid nodes
+    # inputs:
+    #   latitude            your latitude in decimal format
+    #   longitude           your longitude in decimal format
+    #   day_num             day of the year (1 is Jan 1)
+    # outputs:
+    #   sunrise, sunset in decimal hours at the grid's utc_offset (NaN for polar day/night)
+    def lookup(self, latitude, longitude, day_num):
+        y = (latitude - self.lat0) / self.resolution
+        x = (longitude - self.lon0) / self.resolution
+        if not (0 <= y <= self.num_lat - 1 and 0 <= x <= self.num_lon - 1):
+            raise ValueError('location outside of the grid')
+        if not 1 <= day_num <= self.num_days:
+            raise ValueError('day_num outside of the grid year')
+        i_lat = min(int(y), self.num_lat - 2) if self.num_lat > 1 else 0
+        i_lon = min(int(x), self.num_lon - 2) if self.num_lon > 1 else 0
+        fy = y - i_lat
+        fx = x - i_lon
+        i_lat1 = min(i_lat + 1, self.num_lat - 1)
+        i_lon1 = min(i_lon + 1, self.num_lon - 1)
+
+        n00 = self._node(i_lat, i_lon, day_num)
+        n01 = self._node(i_lat, i_lon1, day_num)
+        n10 = self._node(i_lat1, i_lon, day_num)
+        n11 = self._node(i_lat1, i_lon1, day_num)
+        return tuple(float((n00[k]*(1 - fx) + n01[k]*fx)*(1 - fy) + (n10[k]*(1 - fx) + n11[k]*fx)*fy)
+                     for k in (0, 1))
+
+
+# example
+# -out grid_2020.bin -peri "20200105 07:48" -sols "20191222 04:19" -utc_offset 0 -res 0.25
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-out', '--output', help='grid file to write', required=True)
+    parser.add_argument('-peri', '--perihelion_date', help='date/time of perihelion YYYYMMDD HH:MM', required=True)
+    parser.add_argument('-sols', '--solstice_date', help='date/time of previous solstice YYYYMMDD HH:MM',
+                        required=True)
+    parser.add_argument('-utc_offset', '--utc_offset', help='timezone of the stored times', type=float, default=0)
+    parser.add_argument('-res', '--resolution', help='grid spacing in degrees', type=float, default=1.0)
+    parser.add_argument('-lat_range', '--lat_range', help='south north', type=float, nargs=2, default=[-60, 60])
+    parser.add_argument('-lon_range', '--lon_range', help='west east', type=float, nargs=2, default=[-180, 180])
+    args = parser.parse_args()
+    build_grid(args.output, args.perihelion_date, args.solstice_date, args.utc_offset, args.resolution,
+               tuple(args.lat_range), tuple(args.lon_range))
@@ -0,0 +1,176 @@
+from __future__ import division
+from math import pi, radians, sin, cos
+from datetime import date
+from sun_rise_set import (SunTable, _year_setup, _orbit_funcs, _horizon_rads, _hour_angle, _dst_setup,
+                          _dst_correction)
+
+# sun_rise_set() split into stages, every stage is kept until one of its inputs changes
+#
+#   orbit       year setup and the declination / equation of time functions     peri_date, sols_date
+#   sky         declination and equation of time of every day                   orbit, longitude
+#   hour_angle  half the length of every day                                    sky, latitude, elevation
+#   noon        solar noon of every day without DST                             sky, longitude, std_tz
+#   tz_shift    DST correction of every day                                     orbit, std_tz, dst_tz, dst_start_date,
+#                                                                               dst_end_date, dst_rule
+#   results     the SunTable                                                    hour_angle, noon, tz_shift
+#
+# so an elevation or latitude sweep only recomputes the hour angles, a timezone sweep only the solar noons and
+# DST corrections.  Results are identical to sun_rise_set().
+#
+# example
+#   model = SunModel(40.716, -74.017, 0, "20200105 07:48", "20191222 04:19", -5, dst_rule='US')
+#   for elevation, results in model.sweep('elevation', range(0, 3000, 100)):
+#       ...
+
+inputs = ['latitude', 'longitude', 'elevation', 'peri_date', 'sols_date', 'std_tz', 'dst_tz', 'dst_start_date',
+          'dst_end_date', 'dst_rule']
+
+# stage -> (inputs, stages) it is computed from
+_depends = {'orbit': (('peri_date', 'sols_date'), ()),
+            'sky': (('longitude',), ('orbit',)),
+            'hour_angle': (('latitude', 'elevation'), ('sky',)),
+            'noon': (('longitude', 'std_tz'), ('sky',)),
+            'tz_shift': (('std_tz', 'dst_tz', 'dst_start_date', 'dst_end_date', 'dst_rule'), ('orbit',)),
+            'results': ((), ('hour_angle', 'noon', 'tz_shift'))}
+
+
+# stages that have to be recomputed when a stage changes, the stage itself included
+def _downstream(stage):
+    stages = {stage}
+    for name, (_, upstream) in _depends.items():
+        if stage in upstream:
+            stages |= _downstream(name)
+    return stages
+
+
+_invalidates = dict((name, set().union(*[_downstream(stage) for stage, (names, _) in _depends.items()
+                                         if name in names]))
+                    for name in inputs)
+
+
+class SunModel(object):
+    """ Stateful sun_rise_set() that only recomputes the stages depending on the inputs that changed """
+
+    def __init__(self, latitude, longitude, elevation, peri_date, sols_date, std_tz, dst_tz=999,
+                 dst_start_date='', dst_end_date='', dst_rule=None):
+        self._inputs = {'latitude': latitude, 'longitude': longitude, 'elevation': elevation,
+                        'peri_date': peri_date, 'sols_date': sols_date, 'std_tz': std_tz, 'dst_tz': dst_tz,
+                        'dst_start_date': dst_start_date, 'dst_end_date': dst_end_date, 'dst_rule': dst_rule}
+        self._stages = {}
+        self.computed = dict((stage, 0) for stage in _depends)  # times each stage was computed
+
+    # Changes inputs, see sun_rise_set() for their meaning
+    def update(self, **changes):
+        for name, value in changes.items():
+            if name not in self._inputs:
+                raise TypeError('unknown SunModel input: ' + name)
+            if self._inputs[name] != value:
+                self._inputs[name] = value
+                for stage in _invalidates[name]:
+                    self._stages.pop(stage, None)
+
+    def _stage(self, stage):
+        value = self._stages.get(stage)
+        if value is None:
+            value = getattr(self, '_compute_' + stage)()
+            self._stages[stage] = value
+            self.computed[stage] += 1
+        return value
+
+    def _compute_orbit(self):
+        year, num_days, peri_day, p_degs = _year_setup(self._inputs['peri_date'], self._inputs['sols_date'])
+        declination, eot_mins = _orbit_funcs(peri_day, p_degs)
+        return year, num_days, declination, eot_mins
+
+    # sin and cos of the declination, and the equation of time, days 0..num_days
+    def _compute_sky(self):
+        year, num_days, declination, eot_mins = self._stage('orbit')
+        longitude = self._inputs['longitude']
+        sin_c, cos_c, eot = [], [], []
+        for day_num in range(num_days + 1):
+            c = declination(day_num + 0.5 - (longitude / 360))
+            sin_c.append(sin(c))
+            cos_c.append(cos(c))
+            eot.append(eot_mins(day_num + 0.5 - (longitude / 360)))
+        return sin_c, cos_c, eot
+
+    # hour angle of sunrise/sunset in hours and the status (see Record), days 0..num_days
+    def _compute_hour_angle(self):
+        sin_c, cos_c = self._stage('sky')[:2]
+        sin_a = sin(_horizon_rads(self._inputs['elevation']))
+        b = radians(self._inputs['latitude'])
+        sin_b = sin(b)
+        cos_b = cos(b)
+        w_hrs, status = [], []
+        for s, c in zip(sin_c, cos_c):
+            w, day_status = _hour_angle((sin_a - sin_b * s) / (cos_b * c))
+            w_hrs.append(w*360/(2*pi)/15)
+            status.append(day_status)
+        return w_hrs, status
+
+    # solar noon in decimal hours of standard time, days 0..num_days
+    def _compute_noon(self):
+        eot = self._stage('sky')[2]
+        # correction for specific longitude (i.e. not being directly on the timezone meridian)
+        longitude_correction_hrs = (self._inputs['std_tz'] * 15 - self._inputs['longitude']) / 15
+        return [12 - eot_mins / 60 + longitude_correction_hrs for eot_mins in eot]
+
+    # hours added to standard time, days 1..num_days
+    def _compute_tz_shift(self):
+        year, num_days = self._stage('orbit')[:2]
+        std_tz = self._inputs['std_tz']
+        dst_tz, dst_days = _dst_setup(year, std_tz, self._inputs['dst_tz'], self._inputs['dst_start_date'],
+                                      self._inputs['dst_end_date'], self._inputs['dst_rule'])
+        return [_dst_correction(day_num, std_tz, dst_tz, dst_days) for day_num in range(1, num_days + 1)]
+
+    def _compute_results(self):
+        year, num_days = self._stage('orbit')[:2]
+        w_hrs, status = self._stage('hour_angle')
+        noon = self._stage('noon')
+        tz_shift = self._stage('tz_shift')
+
+        sunrise_no_dst = [n - w for n, w in zip(noon, w_hrs)]
+        sunset_no_dst = [n + w for n, w in zip(noon, w_hrs)]
+        solar_noon_dec = [n + dst for n, dst in zip(noon[1:], tz_shift)]
+        sunrise_dec = [n - w for n, w in zip(solar_noon_dec, w_hrs[1:])]
+        sunset_dec = [n + w for n, w in zip(solar_noon_dec, w_hrs[1:])]
+        first_ord = date(year, 1, 1).toordinal()
+        return SunTable.from_columns(
+            day_ord=range(first_ord, first_ord + num_days),
+            solar_noon_dec=solar_noon_dec,
+            sunrise_dec=sunrise_dec,
+            sunset_dec=sunset_dec,
+            daylight_hours=[s - r for r, s in zip(sunrise_dec, sunset_dec)],
+            sunrise_change_mins=[(prev - cur)*60 for prev, cur in zip(sunrise_no_dst, sunrise_no_dst[1:])],
+            sunset_change_mins=[(cur - prev)*60 for prev, cur in zip(sunset_no_dst, sunset_no_dst[1:])],
+            status=status[1:])
+
+    # Sunrise Sunset Data for the current inputs
+    # outputs:
+    #   SunTable            shared with later calls until an input changes, do not modify it
+    def results(self):
+        return self._stage('results')
+
+    # Results for every value of one input, the other inputs are kept
+    # inputs:
+    #   name                one of inputs
+    #   values              values of the input
+    # outputs:
+    #   (value, SunTable) pairs
+    def sweep(self, name, values):
+        for value in values:
+            self.update(**{name: value})
+            yield value, self.results()
+
+
+def _input_property(name):
+    def fget(self):
+        return self._inputs[name]
+
+    def fset(self, value):
+        self.update(**{name: value})
+    return property(fget, fset)
+
+
+for _name in inputs:
+    setattr(SunModel, _name, _input_property(_name))
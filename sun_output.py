@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+import sys
+from datetime import date
+from sun_rise_set import dec_to_clk_list, POLAR_DAY, POLAR_NIGHT
+
+# Output formats of cmd_line_parser.py
+#   text    human readable console lines with clock times
+#   csv     one row per day with a header line, raw decimal values
+#   jsonl   one JSON object per day, raw decimal values
+formats = ['text', 'csv', 'jsonl']
+
+# status: 0 normal, 1 polar day, -1 polar night (see Record in sun_rise_set.py)
+fields = ['title', 'date', 'solar_noon_dec', 'sunrise_dec', 'sunset_dec', 'daylight_hours', 'sunrise_change_mins',
+          'sunset_change_mins', 'status']
+
+# shown instead of the sunrise/sunset clock times of the text format
+polar_labels = {POLAR_DAY: 'polar day', POLAR_NIGHT: 'polar night'}
+
+# size of the write buffer used for --output files
+buffer_size = 1 << 20
+
+
+def dc2(dec_times):
+    return dec_to_clk_list(dec_times, 12, False)
+
+
+# Console lines for one location, same layout as cmd_line_parser.py
+# inputs:
+#   title               title printed at the start of every line
+#   results             Records, see sun_rise_set()
+# outputs:
+#   list of lines
+def format_results(title, results):
+    res_str = title + ": {0:}  Solar Noon = {1:}  Sunrise = {2:}  Sunset = {3:}  Daylight(hrs) = {4:5.3f}"
+    res_str += "  Sunrise Change (mins) = {5:5.3f}  Sunset Change (mins) = {6:5.3f}"
+    solar_noon = dc2([i.solar_noon_dec for i in results])
+    sunrise = dc2([i.sunrise_dec for i in results])
+    sunset = dc2([i.sunset_dec for i in results])
+    for n, i in enumerate(results):
+        if i.status in polar_labels:
+            sunrise[n] = sunset[n] = polar_labels[i.status]
+    return [res_str.format(i.cal_date, solar_noon[n], sunrise[n], sunset[n], i.daylight_hours,
+                           i.sunrise_change_mins, i.sunset_change_mins) for n, i in enumerate(results)]
+
+
+# ISO dates (YYYY-MM-DD) of the Records
+def _iso_dates(results):
+    return [date.fromordinal(i.day_ord).isoformat() for i in results]
+
+
+# Header line of a format, '' if the format has none
+def header(fmt):
+    if fmt == 'csv':
+        return ','.join(fields) + '\n'
+    return ''
+
+
+# All lines of one location as a single string, ready for one write() call
+# inputs:
+#   title               title of the location
+#   results             Records, see sun_rise_set()
+#   fmt                 one of formats
+# outputs:
+#   text, every line ends with a newline
+def format_chunk(title, results, fmt):
+    if fmt == 'text':
+        lines = format_results(title, results)
+    elif fmt == 'csv':
+        # csv.writer quotes titles with commas, quotes or line breaks the way location_runner's reader expects
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator='\n').writerows(
+            (title, d, repr(i.solar_noon_dec), repr(i.sunrise_dec), repr(i.sunset_dec), repr(i.daylight_hours),
+             repr(i.sunrise_change_mins), repr(i.sunset_change_mins), str(i.status))
+            for d, i in zip(_iso_dates(results), results))
+        return buf.getvalue()
+    elif fmt == 'jsonl':
+        lines = [json.dumps({'title': title, 'date': d, 'solar_noon_dec': i.solar_noon_dec,
+                             'sunrise_dec': i.sunrise_dec, 'sunset_dec': i.sunset_dec,
+                             'daylight_hours': i.daylight_hours, 'sunrise_change_mins': i.sunrise_change_mins,
+                             'sunset_change_mins': i.sunset_change_mins, 'status': i.status})
+                 for d, i in zip(_iso_dates(results), results)]
+    else:
+        raise ValueError('unknown output format: ' + str(fmt))
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+# Opens the output stream, a buffered file or stdout
+# inputs:
+#   path                output file, None or '-' for stdout
+# outputs:
+#   file object
+def open_output(path):
+    if path is None or path == '-':
+        return sys.stdout
+    return io.open(path, 'w', buffering=buffer_size, newline='')
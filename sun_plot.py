@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+from sun_rise_set import dec_to_clk
+
+try:
+    from matplotlib.gridspec import GridSpec
+    import matplotlib.dates as mdates
+    import matplotlib.ticker as tick
+except ImportError:  # matplotlib is only needed for the figure builders, plot_series() works without it
+    GridSpec = None
+
+
+# Data series of the four-panel sunrise/sunset plot (see sunrise_gui_cli.py)
+# inputs:
+#   results             Records of one year, see sun_rise_set()
+#   year                year of the records, None to take the dates from the Records (any range of days,
+#                       e.g. from iter_sun_rise_set())
+# outputs:
+#   dict of lists, all indexed by day of the year
+def plot_series(results, year):
+    if year is None:
+        date_list = [datetime.fromordinal(i.day_ord) for i in results]
+    else:
+        first_day = datetime.strptime(str(year) + '0101', '%Y%m%d').timetuple().tm_yday
+        last_day = datetime.strptime(str(year) + '1231', '%Y%m%d').timetuple().tm_yday
+        num_days = last_day - first_day + 1
+
+        # date list for x axis of all plots
+        base = datetime.strptime(str(year) + '0101', '%Y%m%d')
+        date_list = [base + timedelta(days=x) for x in range(0, num_days)]
+    return {'date_list': date_list,
+            'y_rise': [i.sunrise_dec for i in results],
+            'y_set': [i.sunset_dec for i in results],
+            'y_solar_noon': [i.solar_noon_dec for i in results],
+            'day_length': [i.daylight_hours for i in results],
+            'sunrise_roc': [i.sunrise_change_mins for i in results],
+            'sunset_roc': [i.sunset_change_mins for i in results],
+            'total_roc': [i.change_total_mins for i in results]}
+
+
+# convert a time in decimal to 24-hour time
+def dec_to_clk_ff(time_dec, i):
+    return dec_to_clk(time_dec)
+
+
+# Builds the four-panel figure without any data, so it can be filled in for many locations (see fill_figure)
+# inputs:
+#   fig                 empty matplotlib Figure, e.g. plt.figure(figsize=(10, 6)) or, headless,
+#                       Figure(figsize=(10, 6)) with a FigureCanvasAgg
+# outputs:
+#   dict of the axes and lines that fill_figure() updates
+def build_figure(fig):
+    fig.subplots_adjust(top=.925, left=0.100, right=.950, wspace=0.1)
+    gs = GridSpec(28, 28, figure=fig)
+
+    # main plot
+    ax_0_0 = fig.add_subplot(gs.new_subplotspec((0, 2), colspan=25, rowspan=10))
+    ax_0_0.grid(which='major', linestyle='-', linewidth=0.5, color='grey')
+    ax_0_0.set_xlabel('Day of Year')
+    ax_0_0.xaxis.set_major_locator(mdates.MonthLocator())
+    ax_0_0.xaxis.set_major_formatter(mdates.DateFormatter('%b'))
+    ax_0_0.xaxis.set_minor_locator(mdates.DayLocator())
+    ax_0_0.set_ylabel('Time (24-hour)')
+    ax_0_0.yaxis.set_major_formatter(tick.FuncFormatter(dec_to_clk_ff))
+    ax_0_0.set_ylim(0, 24)
+    y_rise, = ax_0_0.plot([], [], 'b')
+    y_set, = ax_0_0.plot([], [], 'r')
+    y_solar_noon, = ax_0_0.plot([], [], 'k-.', label='Solar Noon')
+    ax_0_0.legend(loc='best', fontsize='small')
+
+    # Day Length
+    ax_1_0 = fig.add_subplot(gs.new_subplotspec((16, 0), colspan=12, rowspan=12))
+    ax_1_0.set_title("Length of Day ")
+    ax_1_0.grid(which='major', linestyle='-', linewidth=0.5, color='grey')
+    ax_1_0.set_xlabel('Day of Year')
+    ax_1_0.xaxis.set_major_locator(mdates.MonthLocator())
+    ax_1_0.xaxis.set_major_formatter(mdates.DateFormatter('%b'))
+    ax_1_0.set_ylabel('Time (hours)')
+    day_length, = ax_1_0.plot([], [], 'k')
+
+    # Sunrise Sunset Data
+    ax_1_1 = fig.add_subplot(gs.new_subplotspec((16, 16), colspan=12, rowspan=12))
+    ax_1_1.set_title("Sunrise / Sunset Rate of Change\n- days getting shorter, + days getting longer")
+    ax_1_1.grid(which='major', linestyle='-', linewidth=0.5, color='grey')
+    ax_1_1.set_xlabel('Day of Year')
+    ax_1_1.xaxis.set_major_locator(mdates.MonthLocator())
+    ax_1_1.xaxis.set_major_formatter(mdates.DateFormatter('%b'))
+    ax_1_1.set_ylabel('Time (mins)')
+    sunrise_roc, = ax_1_1.plot([], [], 'b--', label='Sunrise')
+    sunset_roc, = ax_1_1.plot([], [], 'r-.', label='Sunset')
+    total_roc, = ax_1_1.plot([], [], 'k', label='Total')
+    ax_1_1.legend(loc='best', fontsize='small')
+
+    return {'fig': fig, 'main': ax_0_0, 'day_length_ax': ax_1_0, 'roc_ax': ax_1_1,
+            'lines': {'y_rise': y_rise, 'y_set': y_set, 'y_solar_noon': y_solar_noon, 'day_length': day_length,
+                      'sunrise_roc': sunrise_roc, 'sunset_roc': sunset_roc, 'total_roc': total_roc}}
+
+
+# Puts the data of one location into a figure made by build_figure(), only line data, limits and the title change
+# inputs:
+#   template            see build_figure()
+#   series              see plot_series()
+#   title               title of the main plot
+#   fixed_x             keep the date ticks fixed while the year stays the same, for rendering many locations
+#                       (the figure can then no longer be zoomed or panned interactively)
+def fill_figure(template, series, title, fixed_x=False):
+    x = mdates.date2num(series['date_list'])
+    for name, line in template['lines'].items():
+        line.set_data(x, series[name])
+    axes = (template['main'], template['day_length_ax'], template['roc_ax'])
+    if fixed_x:
+        _fix_x_ticks(template, axes, (x[0], x[-1]))
+    for ax in axes:
+        ax.relim()
+        ax.autoscale_view(scalex=not fixed_x)  # the main plot keeps its fixed 0-24 hour y axis
+    template['main'].set_title(title)
+
+
+# Every location of a year has the same date axis, so its tick positions and labels are only worked out once
+def _fix_x_ticks(template, axes, x_range):
+    if template.get('x_range') == x_range:
+        return
+    template['x_range'] = x_range
+    for ax in axes:
+        ax.xaxis.set_major_locator(mdates.MonthLocator())
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%b'))
+        if ax is template['main']:
+            ax.xaxis.set_minor_locator(mdates.DayLocator())
+        ax.set_autoscalex_on(True)
+        ax.relim()
+        ax.autoscale_view(scaley=False)
+        ax.set_autoscalex_on(False)
+        major = ax.xaxis.get_majorticklocs()
+        labels = ax.xaxis.get_major_formatter().format_ticks(major)
+        ax.xaxis.set_major_locator(tick.FixedLocator(major))
+        ax.xaxis.set_major_formatter(tick.FixedFormatter(labels))
+        if ax is template['main']:
+            ax.xaxis.set_minor_locator(tick.FixedLocator(ax.xaxis.get_minorticklocs()))
@@ -0,0 +1,97 @@
+from __future__ import division
+from datetime import date, datetime
+from math import radians, sin, cos, pi
+import numpy as np
+from sun_rise_set import _year_setup
+from sun_arrays import _declination_arr, _eot_mins_arr
+from sun_epochs import year_params
+
+# Solar elevation and azimuth through the day, e.g. every minute of a year (525k samples) for tracking
+#
+# Declination and equation of time change little within a day, so like sun_rise_set() they are computed once per
+# day (at local solar noon) and broadcast across the samples of the day.  The hour angle of a sample is the
+# day's angle at midnight plus a per-sample angle that is the same for every day, so cos/sin of the hour angle
+# come from the angle-addition formulas instead of one cos/sin call per sample.
+#
+#   solar time (hours)  utc + longitude/15 + eot/60
+#   hour angle          15 degrees * (solar time - 12)
+#
+# Elevations are geometric (no refraction correction), azimuths are degrees clockwise from north.
+
+
+# Declination (radians) and equation of time (minutes) of every day from start to end
+def _day_terms(start, end, longitude, year_dates):
+    declination, eot_mins = [], []
+    for year in range(start.year, end.year + 1):
+        if year_dates is None:
+            _, num_days, peri_day, p_degs = year_params(year)
+        else:
+            _, num_days, peri_day, p_degs = _year_setup(*year_dates[year])
+        first_ord = date(year, 1, 1).toordinal()
+        first_day = start.toordinal() - first_ord + 1 if year == start.year else 1
+        last_day = end.toordinal() - first_ord + 1 if year == end.year else num_days
+        day_of_year = np.arange(first_day, last_day + 1) + 0.5 - (longitude / 360)
+        declination.append(_declination_arr(day_of_year))
+        eot_mins.append(_eot_mins_arr(day_of_year, p_degs, peri_day))
+    return np.concatenate(declination), np.concatenate(eot_mins)
+
+
+# Solar position series of one location
+# inputs:
+#   latitude            your latitude in decimal format
+#   longitude           your longitude in decimal format
+#   start_date          first day YYYYMMDD
+#   end_date            last day YYYYMMDD (inclusive)
+#   step_secs           seconds between samples, 60 for every minute, 1 for every second
+#   std_tz              timezone of the sample clock, days run from 00:00 to 24:00 in it (0 for UTC)
+#   year_dates          mapping of year -> (peri_date, sols_date) for every year in the range,
+#                       None for the built-in 1900-2100 table (see sun_epochs.py)
+#   dtype               float type of the elevation/azimuth arrays, np.float32 halves the memory
+# outputs:
+#   dict with
+#     'day_ord'         range of date ordinals, one per row
+#     'seconds'         seconds since midnight of every column
+#     'elevation'       (days x samples per day) array of degrees above the horizon
+#     'azimuth'         (days x samples per day) array of degrees clockwise from north
+def solar_position(latitude, longitude, start_date, end_date, step_secs=60, std_tz=0, year_dates=None,
+                   dtype=np.float64):
+    start = datetime.strptime(start_date, '%Y%m%d').date()
+    end = datetime.strptime(end_date, '%Y%m%d').date()
+    declination, eot_mins = _day_terms(start, end, longitude, year_dates)
+    seconds = np.arange(0, 86400, step_secs)
+
+    # hour angle = day part (midnight of the sample clock) + sample part (same for every day)
+    day_angle = np.radians(15 * (-std_tz + longitude / 15 + eot_mins / 60 - 12))
+    sample_angle = 2 * pi * seconds / 86400
+    cos_day, sin_day = np.cos(day_angle), np.sin(day_angle)
+    cos_sample, sin_sample = np.cos(sample_angle), np.sin(sample_angle)
+
+    b = radians(latitude)
+    sin_b = sin(b)
+    cos_b = cos(b)
+    sin_c = np.sin(declination)
+    cos_c = np.cos(declination)
+
+    # the (days x samples) arrays are updated in place to keep the peak memory at a few of them
+    cos_h = np.multiply.outer(cos_day, cos_sample)
+    cos_h -= np.multiply.outer(sin_day, sin_sample)
+    elevation = cos_h * (cos_b * cos_c)[:, None]
+    elevation += (sin_b * sin_c)[:, None]
+    np.clip(elevation, -1, 1, out=elevation)
+    np.arcsin(elevation, out=elevation)
+    np.degrees(elevation, out=elevation)
+
+    cos_h *= (-sin_b * cos_c)[:, None]
+    cos_h += (cos_b * sin_c)[:, None]
+    azimuth = np.multiply.outer(sin_day, cos_sample)
+    azimuth += np.multiply.outer(cos_day, sin_sample)
+    azimuth *= -cos_c[:, None]
+    np.arctan2(azimuth, cos_h, out=azimuth)
+    np.degrees(azimuth, out=azimuth)
+    np.remainder(azimuth, 360, out=azimuth)
+
+    first_ord = start.toordinal()
+    return {'day_ord': range(first_ord, end.toordinal() + 1),
+            'seconds': seconds,
+            'elevation': elevation.astype(dtype, copy=False),
+            'azimuth': azimuth.astype(dtype, copy=False)}
@@ -1,12 +1,24 @@
 from __future__ import division
 from math import pi, radians, pow, sin, asin, cos, acos, sqrt
-from datetime import datetime, timedelta
+from datetime import date, datetime
+from array import array
+from timeit import default_timer
+from dst_rules import dst_window
 
 e = 0.01671022              # earth orbit eccentricity
 orb_per = 365.25696         # earth orbital period
 axis_norm_degs = 23.4367    # angle between the earth's axis and the norm of the orbit
 p_deg_factor = 1.032        # approx factor to multiply days between solstice and perihelion to calc p angle in deg
 
+# Record.status, whether the sun crosses the sunrise/sunset altitude on a day
+POLAR_NIGHT = -1            # stays below it, sunrise = sunset = solar noon and 0 hours of daylight
+NORMAL = 0
+POLAR_DAY = 1               # stays above it, sunrise/sunset 12 hours before/after solar noon and 24 hours of daylight
+
+# altitudes of the center of the sun in degrees, for the thresholds argument of sun_rise_set()
+# any other name -> altitude mapping works as well, e.g. {'geometric': -0.83, 'golden_hour': 6}
+twilights = {'civil': -6, 'nautical': -12, 'astronomical': -18}
+
 
 # Sources of formulas:
 # [1]   Position of the Sun
@@ -68,32 +80,53 @@ def _declination(day_of_year):
                               ratio_pi_e*sin(radians(ratio360*(d_offset-2)))))))
 
 
+# cal_date is either the day's proleptic Gregorian ordinal (see date.toordinal), formatted only when the
+# cal_date property is read, or an already formatted "Mon DD YYYY" string
+# status is NORMAL, POLAR_DAY or POLAR_NIGHT
 class Record(object):
     """ Used similar to a C struct """
-    __slots__ = ['_cal_date', '_solar_noon_dec', '_sunrise_dec', '_sunset_dec', '_daylight_hours',
-                 '_sunrise_change_mins', '_sunset_change_mins']
+    __slots__ = ['_day_ord', '_cal_date', '_solar_noon_dec', '_sunrise_dec', '_sunset_dec', '_daylight_hours',
+                 '_sunrise_change_mins', '_sunset_change_mins', '_status']
 
     def __init__(self, cal_date, solar_noon_dec, sunrise_dec, sunset_dec, daylight_hours,
-                 sunrise_change_mins, sunset_change_mins):
-        self._cal_date = cal_date
+                 sunrise_change_mins, sunset_change_mins, status=NORMAL):
+        if isinstance(cal_date, str):
+            self._day_ord = None
+            self._cal_date = cal_date
+        else:
+            self._day_ord = cal_date
+            self._cal_date = None
         self._solar_noon_dec = solar_noon_dec
         self._sunrise_dec = sunrise_dec
         self._sunset_dec = sunset_dec
         self._daylight_hours = daylight_hours
         self._sunrise_change_mins = sunrise_change_mins
         self._sunset_change_mins = sunset_change_mins
+        self._status = status
 
     @property
     def cal_date(self):
+        if self._cal_date is None:
+            self._cal_date = date.fromordinal(self._day_ord).strftime("%b %d %Y")
         return self._cal_date
 
+    @property
+    def day_ord(self):
+        if self._day_ord is None:
+            self._day_ord = datetime.strptime(self._cal_date, "%b %d %Y").toordinal()
+        return self._day_ord
+
+    @property
+    def date(self):
+        return date.fromordinal(self.day_ord)
+
     @property
     def solar_noon_dec(self):
         return self._solar_noon_dec
 
     @property
     def solar_noon_hrs(self):
-        return dec_to_clk(self._solar_noon_dec)
+        return dec_to_clk(self.solar_noon_dec)
 
     @property
     def sunrise_dec(self):
@@ -101,7 +134,7 @@ class Record(object):
 
     @property
     def sunrise_hrs(self):
-        return dec_to_clk(self._sunrise_dec)
+        return dec_to_clk(self.sunrise_dec)
 
     @property
     def sunset_dec(self):
@@ -109,7 +142,7 @@ class Record(object):
 
     @property
     def sunset_hrs(self):
-        return dec_to_clk(self._sunset_dec)
+        return dec_to_clk(self.sunset_dec)
 
     @property
     def daylight_hours(self):
@@ -123,9 +156,359 @@ class Record(object):
     def sunset_change_mins(self):
         return self._sunset_change_mins
 
+    @property
+    def status(self):
+        return self._status
+
     @property
     def change_total_mins(self):
-        return self._sunrise_change_mins + self._sunset_change_mins
+        return self.sunrise_change_mins + self.sunset_change_mins
+
+
+class PhaseStats(object):
+    """ Wall time and call counts per phase, filled in by sun_rise_set(..., stats=PhaseStats()) """
+
+    def __init__(self):
+        self.phases = {}    # phase -> [seconds, calls], in the order the phases were first seen
+
+    def reset(self):
+        self.phases = {}
+
+    # Adds the time since t0 to a phase
+    # inputs:
+    #   phase               name of the phase
+    #   t0                  start time of the phase (see now())
+    # outputs:
+    #   the current time, the start time of the next phase
+    def lap(self, phase, t0):
+        t1 = default_timer()
+        entry = self.phases.get(phase)
+        if entry is None:
+            self.phases[phase] = [t1 - t0, 1]
+        else:
+            entry[0] += t1 - t0
+            entry[1] += 1
+        return t1
+
+    @staticmethod
+    def now():
+        return default_timer()
+
+    def summary(self):
+        total = sum(seconds for seconds, _ in self.phases.values()) or 1
+        lines = ['{0:<14} {1:>10} {2:>12} {3:>14} {4:>7}'.format(
+            'phase', 'calls', 'total ms', 'per call us', '%')]
+        for phase, (seconds, calls) in self.phases.items():
+            lines.append('{0:<14} {1:>10} {2:>12.3f} {3:>14.3f} {4:>7.1f}'.format(
+                phase, calls, seconds*1e3, seconds*1e6/calls, seconds*100/total))
+        return '\n'.join(lines)
+
+
+class SunTableRow(Record):
+    """ Record-compatible view of one row of a SunTable, nothing is copied """
+    __slots__ = ['_table', '_index']
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    @property
+    def cal_date(self):
+        return date.fromordinal(self._table._day_ord[self._index]).strftime("%b %d %Y")
+
+    @property
+    def day_ord(self):
+        return self._table._day_ord[self._index]
+
+    @property
+    def solar_noon_dec(self):
+        return self._table._solar_noon_dec[self._index]
+
+    @property
+    def sunrise_dec(self):
+        return self._table._sunrise_dec[self._index]
+
+    @property
+    def sunset_dec(self):
+        return self._table._sunset_dec[self._index]
+
+    @property
+    def daylight_hours(self):
+        return self._table._daylight_hours[self._index]
+
+    @property
+    def sunrise_change_mins(self):
+        return self._table._sunrise_change_mins[self._index]
+
+    @property
+    def sunset_change_mins(self):
+        return self._table._sunset_change_mins[self._index]
+
+    @property
+    def status(self):
+        return self._table._status[self._index]
+
+    # extra columns of the table, see SunTable.add_column
+    # private names are never columns, copy and pickle look some up before _table is set
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self._table._extra[name][self._index]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class SunTable(object):
+    """ Columnar list of Records, one array.array per field and day ordinals instead of date strings """
+    columns = ['day_ord', 'solar_noon_dec', 'sunrise_dec', 'sunset_dec', 'daylight_hours',
+               'sunrise_change_mins', 'sunset_change_mins', 'status']
+    __slots__ = ['_' + name for name in columns] + ['_extra']
+
+    def __init__(self):
+        self._day_ord = array('l')
+        self._solar_noon_dec = array('d')
+        self._sunrise_dec = array('d')
+        self._sunset_dec = array('d')
+        self._daylight_hours = array('d')
+        self._sunrise_change_mins = array('d')
+        self._sunset_change_mins = array('d')
+        self._status = array('b')
+        self._extra = {}
+
+    def append(self, day_ord, solar_noon_dec, sunrise_dec, sunset_dec, daylight_hours,
+               sunrise_change_mins, sunset_change_mins, status=NORMAL):
+        self._day_ord.append(day_ord)
+        self._solar_noon_dec.append(solar_noon_dec)
+        self._sunrise_dec.append(sunrise_dec)
+        self._sunset_dec.append(sunset_dec)
+        self._daylight_hours.append(daylight_hours)
+        self._sunrise_change_mins.append(sunrise_change_mins)
+        self._sunset_change_mins.append(sunset_change_mins)
+        self._status.append(status)
+
+    # Builds a table from whole columns (lists, arrays or numpy arrays), see columns for the names
+    # status may be left out when every day is NORMAL
+    @classmethod
+    def from_columns(cls, **cols):
+        table = cls()
+        for name in cls.columns:
+            if name == 'status' and name not in cols:
+                table._status.extend([NORMAL] * len(table._day_ord))
+            else:
+                getattr(table, '_' + name).extend(cols[name])
+        return table
+
+    # The array.array holding one column, see columns and extra_columns for the names
+    def column(self, name):
+        if name in self._extra:
+            return self._extra[name]
+        return getattr(self, '_' + name)
+
+    # Adds an empty column next to the Record fields, e.g. the twilight times of sun_rise_set(thresholds=...)
+    # inputs:
+    #   name                column name, rows give its values as attributes
+    #   typecode            array.array typecode of the values
+    # outputs:
+    #   the new array.array, filled by the caller
+    def add_column(self, name, typecode='d'):
+        if name in self.columns or name in self._extra:
+            raise ValueError('column already exists: ' + name)
+        self._extra[name] = array(typecode)
+        return self._extra[name]
+
+    # names of the columns added with add_column, in the order they were added
+    @property
+    def extra_columns(self):
+        return list(self._extra)
+
+    def __len__(self):
+        return len(self._day_ord)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [SunTableRow(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('SunTable index out of range')
+        return SunTableRow(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield SunTableRow(self, i)
+
+
+# Year setup shared by the scalar and array engines, parses the perihelion and solstice dates once
+# inputs:
+#   peri_date           date of perihelion in London YYYYMMDD HH:MM'
+#   sols_date           date of previous solstice in London YYYYMMDD HH:MM'
+# outputs:
+#   year, number of days in the year, peri_day and p_degs (see _eot_mins)
+def _year_setup(peri_date, sols_date):
+    peri_datetime = datetime.strptime(peri_date, '%Y%m%d %H:%M')
+    sols_datetime = datetime.strptime(sols_date, '%Y%m%d %H:%M')
+    return _year_setup_dt(peri_datetime, sols_datetime)
+
+
+# Year setup from already parsed perihelion and solstice datetimes, see _year_setup
+def _year_setup_dt(peri_datetime, sols_datetime):
+    year = peri_datetime.year
+    num_days = datetime(year, 12, 31).timetuple().tm_yday
+
+    peri_day_part = peri_datetime.timetuple().tm_yday  # or tm_mday, same ans for Jan
+    peri_min_part = peri_datetime.minute
+    peri_day = peri_day_part + peri_min_part/1440
+
+    diff = peri_datetime - sols_datetime
+    p_degs = (diff.total_seconds()/(60*60*24))*p_deg_factor
+    return year, num_days, peri_day, p_degs
+
+
+# DST window as days of the year
+# inputs:
+#   dst_start_date      DST start date YYYYMMDD
+#   dst_end_date        DST End Date YYYYMMDD
+# outputs:
+#   (first day of DST, first day back on standard time), or None if there is no DST
+def _dst_days(dst_start_date, dst_end_date):
+    if dst_start_date == '':
+        return None
+    dst_start_day = datetime.strptime(dst_start_date, '%Y%m%d').timetuple().tm_yday
+    dst_end_day = datetime.strptime(dst_end_date, '%Y%m%d').timetuple().tm_yday
+    return dst_start_day, dst_end_day
+
+
+# DST correction for one day, an O(1) comparison against the DST window
+# inputs:
+#   day_num             day of the year
+#   std_tz              standard timezone
+#   dst_tz              DST timezone
+#   dst_days            see _dst_days
+# outputs:
+#   hours to add to standard time
+def _dst_correction(day_num, std_tz, dst_tz, dst_days):
+    if dst_days is None:
+        return 0
+    dst_start_day, dst_end_day = dst_days
+    if dst_end_day >= dst_start_day:
+        if dst_start_day <= day_num < dst_end_day:
+            return dst_tz - std_tz
+    elif day_num < dst_end_day or day_num >= dst_start_day:
+        return dst_tz - std_tz
+    return 0
+
+
+# DST timezone and window of a year, from literal dates or from a DST rule
+# inputs:
+#   year                the year
+#   std_tz              standard timezone
+#   dst_tz              DST timezone, 999 with dst_rule for std_tz plus the rule's offset
+#   dst_start_date      DST start date YYYYMMDD
+#   dst_end_date        DST End Date YYYYMMDD
+#   dst_rule            None, or a region of dst_rules.py ('US', 'AU', 'MX', 'none'), replaces the dates
+# outputs:
+#   dst_tz, dst_days (see _dst_days)
+def _dst_setup(year, std_tz, dst_tz, dst_start_date, dst_end_date, dst_rule=None):
+    if dst_rule is None:
+        return dst_tz, _dst_days(dst_start_date, dst_end_date)
+    dst_days, save_hrs = dst_window(dst_rule, year)
+    if dst_tz == 999:
+        dst_tz = std_tz + save_hrs
+    return dst_tz, dst_days
+
+
+# Solar noon and half the length of day for one day, based on source [3]
+# inputs:
+#   day_num             day of the year (0 is Dec 31 of the previous year)
+#   a                   altitude of the sun at sunrise/sunset in radians, see _horizon_rads
+#   b                   latitude in radians
+#   longitude           your longitude in decimal format
+#   longitude_correction_hrs    (std_tz * 15 - longitude) / 15
+#   declination         declination function, see _declination
+#   eot_mins            equation of time function of the day of the year, see _eot_mins
+# outputs:
+#   solar noon in decimal hours of standard time, hour angle of sunrise/sunset in hours, status (see Record)
+def _solar_day(day_num, a, b, longitude, longitude_correction_hrs, declination, eot_mins):
+    c = declination(day_num + 0.5 - (longitude / 360))
+    w, status = _hour_angle((sin(a) - sin(b) * sin(c)) / (cos(b) * cos(c)))
+    w_degs = w*360/(2*pi)
+    w_hrs = w_degs/15
+    eot_correction_hrs = eot_mins(day_num + 0.5 - (longitude / 360)) / 60
+    solar_noon_dec_no_dst = 12 - eot_correction_hrs + longitude_correction_hrs
+    return solar_noon_dec_no_dst, w_hrs, status
+
+
+# _solar_day plus the hour angles of further altitudes of the sun (twilights), the declination, equation of
+# time and latitude/declination products are worked out once and shared by every altitude
+# inputs:
+#   sin_alts            sines of the further altitudes
+#   other inputs        see _solar_day
+# outputs:
+#   solar noon, hour angle and status as _solar_day (same values), list of (hour angle in hours, status) of
+#   every further altitude
+def _solar_day_thresholds(day_num, a, b, sin_alts, longitude, longitude_correction_hrs, declination, eot_mins):
+    day_of_year = day_num + 0.5 - (longitude / 360)
+    c = declination(day_of_year)
+    sin_b_sin_c = sin(b) * sin(c)
+    cos_b_cos_c = cos(b) * cos(c)
+    w, status = _hour_angle((sin(a) - sin_b_sin_c) / cos_b_cos_c)
+    eot_correction_hrs = eot_mins(day_of_year) / 60
+    solar_noon_dec_no_dst = 12 - eot_correction_hrs + longitude_correction_hrs
+    hour_angles = []
+    for sin_alt in sin_alts:
+        w_alt, status_alt = _hour_angle((sin_alt - sin_b_sin_c) / cos_b_cos_c)
+        hour_angles.append((w_alt*360/(2*pi)/15, status_alt))
+    return solar_noon_dec_no_dst, w*360/(2*pi)/15, status, hour_angles
+
+
+# Names of the extra columns of sun_rise_set(thresholds=...), in column order
+def _threshold_columns(thresholds):
+    names = []
+    for name in thresholds or ():
+        names += [name + '_dawn_dec', name + '_dusk_dec', name + '_status']
+    return names
+
+
+# Hour angle of sunrise/sunset, clamped on days the sun does not cross the sunrise/sunset altitude
+# (polar day/night, also near the polar circles at high elevations) instead of raising a math domain error
+# inputs:
+#   cos_w               cosine of the hour angle, (sin(a) - sin(b)*sin(c)) / (cos(b)*cos(c))
+# outputs:
+#   hour angle in radians (0 for polar night, pi for polar day), status (see Record)
+def _hour_angle(cos_w):
+    if cos_w > 1:
+        return 0.0, POLAR_NIGHT
+    if cos_w < -1:
+        return pi, POLAR_DAY
+    return acos(cos_w), NORMAL
+
+
+# Altitude of the center of the sun at sunrise/sunset
+# inputs:
+#   elevation           your elevation in meters
+# outputs:
+#   altitude in radians
+def _horizon_rads(elevation):
+    # correction for refraction
+    center_solar_disc = -0.83
+    elevation_correction = -2.076*sqrt(elevation/60)
+    return radians(center_solar_disc + elevation_correction)
+
+
+# Declination and equation of time functions for one year
+# inputs:
+#   peri_day, p_degs    see _eot_mins
+#   ephemeris           optional, tabulated declination and equation of time (see ephemeris.get_ephemeris)
+# outputs:
+#   declination function, equation of time function of the day of the year
+def _orbit_funcs(peri_day, p_degs, ephemeris=None):
+    if ephemeris is not None:
+        return ephemeris.declination, ephemeris.eot_mins
+
+    def eot_mins(day_of_year):
+        return _eot_mins(day_of_year, p_degs, peri_day)
+    return _declination, eot_mins
 
 
 # Sunrise Sunset Data, based on source [3]
@@ -139,81 +522,90 @@ class Record(object):
 #   dst_tz              DST timezone
 #   dst_start_date      DST start date YYYYMMDD
 #   dst_end_date        DST End Date YYYYMMDD
+#   dst_rule            optional DST region of dst_rules.py ('US', 'AU', 'MX', 'none'), replaces the DST dates,
+#                       dst_tz may then be left at 999 for std_tz plus the rule's offset
+#   ephemeris           optional, tabulated declination and equation of time (see ephemeris.get_ephemeris), or
+#                       another declination/equation of time/refraction model (see sun_backends.get_backend)
+#   stats               optional PhaseStats, time spent in each phase is added to it
+#   thresholds          optional mapping of name -> altitude of the center of the sun in degrees (see twilights),
+#                       every name adds <name>_dawn_dec, <name>_dusk_dec and <name>_status columns to the SunTable,
+#                       computed in the same pass as sunrise/sunset.  The altitudes are taken as given, without the
+#                       elevation correction of the sunrise/sunset altitude.  <name>_status is POLAR_DAY when the
+#                       sun stays above the altitude all day (e.g. no astronomical night), dawn/dusk are then 12
+#                       hours before/after solar noon, and POLAR_NIGHT when it never rises to it (both at noon).
 # outputs:
-#   Records             see Record object
+#   SunTable            indexing and iterating give Records, see Record object
 def sun_rise_set(latitude, longitude, elevation, peri_date, sols_date, std_tz, dst_tz=999,
-                 dst_start_date='', dst_end_date=''):
+                 dst_start_date='', dst_end_date='', dst_rule=None, ephemeris=None, stats=None, thresholds=None):
 
-    results = []
+    if stats is not None:
+        t = stats.now()
+    year_params = _year_setup(peri_date, sols_date)
+    if stats is not None:
+        stats.lap('year_setup', t)
 
-    year = datetime.strptime(peri_date, '%Y%m%d %H:%M').timetuple().tm_year
-    first_day = datetime.strptime(str(year)+'0101', '%Y%m%d').timetuple().tm_yday
-    last_day = datetime.strptime(str(year)+'1231', '%Y%m%d').timetuple().tm_yday
-    num_days = last_day - first_day + 1
+    return _sun_rise_set(year_params, latitude, longitude, elevation, std_tz, dst_tz, dst_start_date, dst_end_date,
+                         dst_rule, ephemeris, stats, thresholds)
 
-    peri_day_part = datetime.strptime(peri_date, '%Y%m%d %H:%M').timetuple().tm_yday  # or tm_mday, same ans for Jan
-    peri_min_part = datetime.strptime(peri_date, '%Y%m%d %H:%M').timetuple().tm_min
 
-    peri_day = peri_day_part + peri_min_part/1440
-    peri_datetime = datetime.strptime(peri_date, '%Y%m%d %H:%M')
-    sols_datetime = datetime.strptime(sols_date, '%Y%m%d %H:%M')
-    diff = peri_datetime - sols_datetime
-    p_degs = (diff.total_seconds()/(60*60*24))*p_deg_factor
+# sun_rise_set() after the year setup
+# inputs:
+#   year_params         (year, num_days, peri_day, p_degs), see _year_setup
+#   other inputs        see sun_rise_set()
+# outputs:
+#   SunTable
+def _sun_rise_set(year_params, latitude, longitude, elevation, std_tz, dst_tz, dst_start_date, dst_end_date,
+                  dst_rule=None, ephemeris=None, stats=None, thresholds=None):
 
-    tz_list = []
-    if dst_start_date == '':
-        for i in range(1, num_days+1):
-            tz_list.append(std_tz)
-    else:
-        dst_start_day = datetime.strptime(dst_start_date, '%Y%m%d').timetuple().tm_yday
-        dst_end_day = datetime.strptime(dst_end_date, '%Y%m%d').timetuple().tm_yday
-        if dst_end_day >= dst_start_day:
-            for i in range(1, num_days+1):
-                if i < dst_start_day or i >= dst_end_day:
-                    tz_list.append(std_tz)
-                else:
-                    tz_list.append(dst_tz)
-        else:
-            for i in range(1, num_days+1):
-                if i < dst_end_day or i >= dst_start_day:
-                    tz_list.append(dst_tz)
-                else:
-                    tz_list.append(std_tz)
+    if stats is not None:
+        t = stats.now()
 
-    # correction for refraction
-    center_solar_disc = -0.83
-    elevation_correction = -2.076*sqrt(elevation/60)
-    a = radians(center_solar_disc + elevation_correction)
+    results = SunTable()
+
+    year, num_days, peri_day, p_degs = year_params
+    first_ord = date(year, 1, 1).toordinal()
+    declination, eot_mins = _orbit_funcs(peri_day, p_degs, ephemeris)
+    if stats is not None:
+        t = stats.lap('orbit_setup', t)
 
+    dst_tz, dst_days = _dst_setup(year, std_tz, dst_tz, dst_start_date, dst_end_date, dst_rule)
+    if stats is not None:
+        t = stats.lap('dst_setup', t)
+
+    a = _horizon_rads(elevation) if ephemeris is None else ephemeris.horizon_rads(elevation)
     b = radians(latitude)
 
     # correction for specific longitude (i.e. not being directly on the timezone meridian)
     longitude_correction_hrs = (std_tz * 15 - longitude) / 15
 
+    # (dawn, dusk, status) columns of every threshold
+    sin_alts = []
+    threshold_cols = []
+    if thresholds:
+        for name, altitude in thresholds.items():
+            sin_alts.append(sin(radians(altitude)))
+            threshold_cols.append((results.add_column(name + '_dawn_dec'), results.add_column(name + '_dusk_dec'),
+                                   results.add_column(name + '_status', 'b')))
+
     prev_sunrise_dec_no_dst = 0
     prev_sunset_dec_no_dst = 0
-    day_num = 1
-    for tz in tz_list:
+    for day_num in range(1, num_days + 1):
 
         if day_num == 1:  # set initial values for previous sunrise, sunset, and tz change
-            c = _declination(0 + 0.5 - (longitude / 360))
-            w = acos((sin(a) - sin(b) * sin(c)) / (cos(b) * cos(c)))
-            w_degs = w * 360 / (2 * pi)
-            w_hrs = w_degs / 15
-            eot_correction_hrs = _eot_mins(0 + 0.5 - (longitude / 360), p_degs, peri_day) / 60
-            solar_noon_dec_no_dst = 12 - eot_correction_hrs + longitude_correction_hrs
+            solar_noon_dec_no_dst, w_hrs, status = _solar_day(0, a, b, longitude, longitude_correction_hrs,
+                                                              declination, eot_mins)
             prev_sunrise_dec_no_dst = solar_noon_dec_no_dst - w_hrs
             prev_sunset_dec_no_dst = solar_noon_dec_no_dst + w_hrs
 
-        c = _declination(day_num + 0.5 - (longitude / 360))
-        w = acos((sin(a) - sin(b) * sin(c)) / (cos(b) * cos(c)))
-        w_degs = w*360/(2*pi)
-        w_hrs = w_degs/15
-        eot_correction_hrs = _eot_mins(day_num + 0.5 - (longitude / 360), p_degs, peri_day) / 60
-        dst_correction = tz - std_tz
+        if threshold_cols:
+            solar_noon_dec_no_dst, w_hrs, status, hour_angles = _solar_day_thresholds(
+                day_num, a, b, sin_alts, longitude, longitude_correction_hrs, declination, eot_mins)
+        else:
+            solar_noon_dec_no_dst, w_hrs, status = _solar_day(day_num, a, b, longitude, longitude_correction_hrs,
+                                                              declination, eot_mins)
+            hour_angles = ()
+        dst_correction = _dst_correction(day_num, std_tz, dst_tz, dst_days)
 
-        cal_date = (datetime(year, 1, 1) + timedelta(day_num-1)).strftime("%b %d %Y")
-        solar_noon_dec_no_dst = 12 - eot_correction_hrs + longitude_correction_hrs
         solar_noon_dec = solar_noon_dec_no_dst + dst_correction
 
         sunrise_dec = solar_noon_dec - w_hrs
@@ -224,13 +616,155 @@ def sun_rise_set(latitude, longitude, elevation, peri_date, sols_date, std_tz, d
         sunset_change = ((solar_noon_dec_no_dst + w_hrs) - prev_sunset_dec_no_dst)*60
         prev_sunrise_dec_no_dst = solar_noon_dec_no_dst - w_hrs
         prev_sunset_dec_no_dst = solar_noon_dec_no_dst + w_hrs
+        if stats is not None:
+            t = stats.lap('solar_day', t)
+
+        results.append(first_ord + day_num - 1, solar_noon_dec, sunrise_dec, sunset_dec, daylight_hours,
+                       sunrise_change, sunset_change, status)
+        for (dawn, dusk, alt_status), (alt_w_hrs, status_alt) in zip(threshold_cols, hour_angles):
+            dawn.append(solar_noon_dec - alt_w_hrs)
+            dusk.append(solar_noon_dec + alt_w_hrs)
+            alt_status.append(status_alt)
+        if stats is not None:
+            t = stats.lap('records', t)
 
-        rec = Record(cal_date, solar_noon_dec, sunrise_dec, sunset_dec, daylight_hours, sunrise_change, sunset_change)
-        results.append(rec)
+    return results
 
-        day_num += 1
 
-    return results
+# Sunrise Sunset Data for any range of days, one Record at a time, based on source [3]
+# Records are computed lazily so memory use does not depend on the length of the range.  Every day is
+# identical to the matching Record of sun_rise_set() for its year.  The change columns are always taken
+# against the previous day under the same year's perihelion/solstice parameters (day 0 for Jan 1), so
+# the small step where the parameters switch at Jan 1 does not show up as a spike in the change columns.
+# inputs:
+#   start_date          first day YYYYMMDD
+#   end_date            last day YYYYMMDD (inclusive)
+#   latitude            your latitude in decimal format
+#   longitude           your longitude in decimal format
+#   elevation           your elevation in meters
+#   year_dates          mapping of year -> (peri_date, sols_date) for every year in the range, the perihelion
+#                       date must be in its year (ValueError otherwise), None for the built-in 1900-2100 table
+#                       (see sun_epochs.py)
+#   std_tz              standard timezone
+#   dst_tz              DST timezone
+#   dst_dates           optional mapping of year -> (dst_start_date, dst_end_date), years not in it have no DST
+#   dst_rule            optional DST region of dst_rules.py, replaces dst_dates and covers every year
+# outputs:
+#   Records             see Record object
+def iter_sun_rise_set(start_date, end_date, latitude, longitude, elevation, year_dates, std_tz, dst_tz=999,
+                      dst_dates=None, dst_rule=None):
+
+    start = datetime.strptime(start_date, '%Y%m%d').date()
+    end = datetime.strptime(end_date, '%Y%m%d').date()
+
+    a = _horizon_rads(elevation)
+    b = radians(latitude)
+
+    # correction for specific longitude (i.e. not being directly on the timezone meridian)
+    longitude_correction_hrs = (std_tz * 15 - longitude) / 15
+
+    for year in range(start.year, end.year + 1):
+        if year_dates is None:
+            from sun_epochs import year_params
+            year_num, num_days, peri_day, p_degs = year_params(year)
+        else:
+            year_num, num_days, peri_day, p_degs = _year_setup(*year_dates[year])
+            if year_num != year:
+                raise ValueError('year_dates[{0}] has a perihelion date in {1}'.format(year, year_num))
+        declination, eot_mins = _orbit_funcs(peri_day, p_degs)
+        if dst_rule is not None:
+            year_dst_tz, dst_days = _dst_setup(year, std_tz, dst_tz, '', '', dst_rule)
+        elif dst_dates is not None and year in dst_dates:
+            year_dst_tz, dst_days = dst_tz, _dst_days(*dst_dates[year])
+        else:
+            year_dst_tz, dst_days = dst_tz, None
+
+        first_ord = date(year, 1, 1).toordinal()
+        first_day = start.toordinal() - first_ord + 1 if year == start.year else 1
+        last_day = end.toordinal() - first_ord + 1 if year == end.year else num_days
+
+        # set initial values for previous sunrise and sunset
+        solar_noon_dec_no_dst, w_hrs, status = _solar_day(first_day - 1, a, b, longitude,
+                                                          longitude_correction_hrs, declination, eot_mins)
+        prev_sunrise_dec_no_dst = solar_noon_dec_no_dst - w_hrs
+        prev_sunset_dec_no_dst = solar_noon_dec_no_dst + w_hrs
+
+        for day_num in range(first_day, last_day + 1):
+            solar_noon_dec_no_dst, w_hrs, status = _solar_day(day_num, a, b, longitude,
+                                                              longitude_correction_hrs, declination, eot_mins)
+            dst_correction = _dst_correction(day_num, std_tz, year_dst_tz, dst_days)
+            solar_noon_dec = solar_noon_dec_no_dst + dst_correction
+
+            sunrise_dec = solar_noon_dec - w_hrs
+            sunset_dec = solar_noon_dec + w_hrs
+            daylight_hours = sunset_dec - sunrise_dec
+
+            sunrise_change = (prev_sunrise_dec_no_dst - (solar_noon_dec_no_dst - w_hrs))*60
+            sunset_change = ((solar_noon_dec_no_dst + w_hrs) - prev_sunset_dec_no_dst)*60
+            prev_sunrise_dec_no_dst = solar_noon_dec_no_dst - w_hrs
+            prev_sunset_dec_no_dst = solar_noon_dec_no_dst + w_hrs
+
+            yield Record(first_ord + day_num - 1, solar_noon_dec, sunrise_dec, sunset_dec, daylight_hours,
+                         sunrise_change, sunset_change, status)
+
+
+# Sunrise Sunset Data for a single day, based on source [3]
+# Only the requested day and the day before it (for the change columns) are computed.
+# inputs:
+#   for_date            the day, YYYYMMDD or a datetime.date
+#   latitude            your latitude in decimal format
+#   longitude           your longitude in decimal format
+#   elevation           your elevation in meters
+#   peri_date           date of perihelion in London YYYYMMDD HH:MM' (same year as for_date, ValueError otherwise)
+#   sols_date           date of previous solstice in London YYYYMMDD HH:MM'
+#                       pass None for both to use the built-in 1900-2100 table (see sun_epochs.py)
+#   std_tz              standard timezone
+#   dst_tz              DST timezone
+#   dst_start_date      DST start date YYYYMMDD
+#   dst_end_date        DST End Date YYYYMMDD
+#   dst_rule            optional DST region of dst_rules.py, replaces the DST dates
+# outputs:
+#   Record              same values as the matching Record of sun_rise_set()
+def sun_for_date(for_date, latitude, longitude, elevation, peri_date, sols_date, std_tz, dst_tz=999,
+                 dst_start_date='', dst_end_date='', dst_rule=None):
+
+    if not isinstance(for_date, date):
+        for_date = datetime.strptime(for_date, '%Y%m%d').date()
+    day_num = for_date.timetuple().tm_yday
+
+    if peri_date is None:
+        from sun_epochs import year_params
+        year, num_days, peri_day, p_degs = year_params(for_date.year)
+    else:
+        year, num_days, peri_day, p_degs = _year_setup(peri_date, sols_date)
+        if year != for_date.year:
+            raise ValueError('{0} is not in the year of the perihelion date ({1})'.format(for_date.isoformat(), year))
+    declination, eot_mins = _orbit_funcs(peri_day, p_degs)
+
+    a = _horizon_rads(elevation)
+    b = radians(latitude)
+
+    # correction for specific longitude (i.e. not being directly on the timezone meridian)
+    longitude_correction_hrs = (std_tz * 15 - longitude) / 15
+
+    prev_noon_dec_no_dst, prev_w_hrs, prev_status = _solar_day(day_num - 1, a, b, longitude,
+                                                               longitude_correction_hrs, declination, eot_mins)
+    solar_noon_dec_no_dst, w_hrs, status = _solar_day(day_num, a, b, longitude, longitude_correction_hrs,
+                                                      declination, eot_mins)
+    dst_tz, dst_days = _dst_setup(for_date.year, std_tz, dst_tz, dst_start_date, dst_end_date, dst_rule)
+    dst_correction = _dst_correction(day_num, std_tz, dst_tz, dst_days)
+
+    solar_noon_dec = solar_noon_dec_no_dst + dst_correction
+
+    sunrise_dec = solar_noon_dec - w_hrs
+    sunset_dec = solar_noon_dec + w_hrs
+    daylight_hours = sunset_dec - sunrise_dec
+
+    sunrise_change = ((prev_noon_dec_no_dst - prev_w_hrs) - (solar_noon_dec_no_dst - w_hrs))*60
+    sunset_change = ((solar_noon_dec_no_dst + w_hrs) - (prev_noon_dec_no_dst + prev_w_hrs))*60
+
+    return Record(for_date.toordinal(), solar_noon_dec, sunrise_dec, sunset_dec, daylight_hours, sunrise_change,
+                  sunset_change, status)
 
 
 # Converts decimal time to clock time (e.g. 11.5 -> 11:30AM)
@@ -242,7 +776,11 @@ def dec_to_clk(time_dec, format_12_24=24, secs_on=True, fixed_width=True):
     int_hours = int(time_dec)//1
     int_mins = int(time_dec % 1 * 60)//1
     int_secs = int((time_dec % 1 * 60) % 1 * 60) // 1
+    return _clk_from_parts(int_hours, int_mins, int_secs, format_12_24, secs_on, fixed_width)
+
 
+# Clock time from whole hours, minutes and seconds, see dec_to_clk
+def _clk_from_parts(int_hours, int_mins, int_secs, format_12_24, secs_on, fixed_width):
     if not secs_on:
         if int_secs >= 30:
             int_mins += 1
@@ -285,3 +823,30 @@ def dec_to_clk(time_dec, format_12_24=24, secs_on=True, fixed_width=True):
         time_clk += str_am_pm
 
     return time_clk
+
+
+# clock strings already built by dec_to_clk_list, per format and keyed by hours*3600 + mins*60 + secs
+_clk_cache = {}
+
+
+# Converts a sequence of decimal times to clock times, same output as calling dec_to_clk on every value
+# Every distinct second of the day is only formatted once, later values are dictionary lookups.
+# inputs:
+#   decimal times
+# outputs:
+#   list of clock times
+def dec_to_clk_list(times_dec, format_12_24=24, secs_on=True, fixed_width=True):
+    cache = _clk_cache.setdefault((format_12_24, secs_on, fixed_width), {})
+    results = []
+    for time_dec in times_dec:
+        frac_mins = time_dec % 1 * 60
+        int_hours = int(time_dec)
+        int_mins = int(frac_mins)
+        int_secs = int(frac_mins % 1 * 60)
+        key = int_hours*3600 + int_mins*60 + int_secs
+        time_clk = cache.get(key)
+        if time_clk is None:
+            time_clk = _clk_from_parts(int_hours, int_mins, int_secs, format_12_24, secs_on, fixed_width)
+            cache[key] = time_clk
+        results.append(time_clk)
+    return results
@@ -0,0 +1,200 @@
+import argparse
+import asyncio
+import json
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+from sun_rise_set import sun_rise_set, sun_for_date
+from sun_epochs import year_dates
+
+# Sunrise/sunset query service, stdlib only (asyncio + a minimal HTTP/1.1 GET handler)
+#
+#   GET /day?date=YYYYMMDD&<location>                   one Record
+#   GET /range?start=YYYYMMDD&end=YYYYMMDD&<location>   Records from start to end (inclusive, same year, start <= end)
+#
+#   <location>  lat, lon, elev (default 0), peri, sols, std_tz, dst_tz (default 999), dst_start, dst_end, dst_rule
+#               same meaning as the sun_rise_set() inputs, peri/sols default to the built-in table
+#               (see sun_epochs.py) for the year of date/start, e.g.
+#               /day?date=20200704&lat=40.716&lon=-74.017&peri=20200105+07:48&sols=20191222+04:19&std_tz=-5&
+#               dst_tz=-4&dst_start=20200308&dst_end=20201101
+#
+# Identical concurrent requests share one computation, finished responses are kept in an LRU and
+# /range requests are computed in an executor so the event loop keeps serving.
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _record_dict(rec):
+    return {'cal_date': rec.cal_date, 'solar_noon_dec': rec.solar_noon_dec, 'sunrise_dec': rec.sunrise_dec,
+            'sunset_dec': rec.sunset_dec, 'daylight_hours': rec.daylight_hours,
+            'sunrise_change_mins': rec.sunrise_change_mins, 'sunset_change_mins': rec.sunset_change_mins,
+            'status': rec.status}
+
+
+def _location_args(query):
+    try:
+        if 'peri' in query or 'sols' in query:
+            peri_date, sols_date = query['peri'], query['sols']
+        else:
+            peri_date, sols_date = year_dates(int(query.get('date', query.get('start', ''))[:4]))
+        return (float(query['lat']), float(query['lon']), float(query.get('elev', 0)), peri_date,
+                sols_date, float(query['std_tz']), float(query.get('dst_tz', 999)),
+                query.get('dst_start', ''), query.get('dst_end', ''), query.get('dst_rule'))
+    except KeyError as err:
+        raise BadRequest('missing parameter: ' + str(err.args[0]))
+    except ValueError as err:
+        raise BadRequest(str(err))
+
+
+# runs in the executor
+# day of year of start and end, checked before the year is computed
+def _range_days(start_date, end_date, args):
+    year = int(args[3][:4])
+    try:
+        first = datetime.strptime(start_date, '%Y%m%d').timetuple()
+        last = datetime.strptime(end_date, '%Y%m%d').timetuple()
+    except ValueError as err:
+        raise BadRequest(str(err))
+    if first.tm_year != year or last.tm_year != year:
+        raise BadRequest('start and end must be in the year of the perihelion date')
+    if first.tm_yday > last.tm_yday:
+        raise BadRequest('start must not be after end')
+    return first.tm_yday, last.tm_yday
+
+
+def _range_body(start_date, end_date, args):
+    first_day, last_day = _range_days(start_date, end_date, args)
+    records = sun_rise_set(*args)[first_day - 1:last_day]
+    return json.dumps([_record_dict(rec) for rec in records]).encode()
+
+
+def _day_body(for_date, args):
+    if datetime.strptime(for_date, '%Y%m%d').year != int(args[3][:4]):
+        raise BadRequest('date must be in the year of the perihelion date')
+    return json.dumps(_record_dict(sun_for_date(for_date, *args))).encode()
+
+
+class SunServer(object):
+    """ asyncio HTTP server for single-day and range queries """
+
+    def __init__(self, host='127.0.0.1', port=8080, cache_entries=4096, executor=None):
+        self.host = host
+        self.port = port
+        self._cache_entries = cache_entries
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._executor = executor   # None for the event loop's default thread pool
+        self._server = None
+        self.hits = 0               # served from the LRU
+        self.coalesced = 0          # joined a computation already in flight
+        self.misses = 0             # computed
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    # cached or coalesced response body for a normalized request key
+    async def _get(self, key, compute, offload):
+        body = self._cache.get(key)
+        if body is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return body
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        if offload:
+            future = asyncio.ensure_future(loop.run_in_executor(self._executor, compute))
+        else:
+            future = loop.create_future()
+            try:
+                future.set_result(compute())
+            except Exception as err:
+                future.set_exception(err)
+        self._inflight[key] = future
+        try:
+            body = await asyncio.shield(future)
+        finally:
+            del self._inflight[key]
+
+        self._cache[key] = body
+        if len(self._cache) > self._cache_entries:
+            self._cache.popitem(last=False)
+        return body
+
+    async def _respond(self, path, query):
+        if path == '/day':
+            if 'date' not in query:
+                raise BadRequest('missing parameter: date')
+            args = _location_args(query)
+            key = ('day', query['date']) + args
+            return await self._get(key, lambda: _day_body(query['date'], args), False)
+        if path == '/range':
+            if 'start' not in query or 'end' not in query:
+                raise BadRequest('missing parameter: start/end')
+            args = _location_args(query)
+            _range_days(query['start'], query['end'], args)
+            key = ('range', query['start'], query['end']) + args
+            return await self._get(key, lambda: _range_body(query['start'], query['end'], args), True)
+        return None
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while True:  # headers are not used
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+
+                parts = request_line.decode('latin-1').split()
+                status, body = b'200 OK', None
+                if len(parts) < 2 or parts[0] != 'GET':
+                    status, body = b'405 Method Not Allowed', b'{"error": "only GET is supported"}'
+                else:
+                    url = urlsplit(parts[1])
+                    query = dict((k, v[-1]) for k, v in parse_qs(url.query).items())
+                    try:
+                        body = await self._respond(url.path, query)
+                        if body is None:
+                            status, body = b'404 Not Found', b'{"error": "unknown path"}'
+                    except (BadRequest, ValueError) as err:
+                        status, body = b'400 Bad Request', json.dumps({'error': str(err)}).encode()
+
+                writer.write(b'HTTP/1.1 ' + status + b'\r\nContent-Type: application/json\r\n'
+                             b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+# example
+# -host 127.0.0.1 -port 8080
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-host', '--host', help='address to listen on', default='127.0.0.1')
+    parser.add_argument('-port', '--port', help='port to listen on', type=int, default=8080)
+    parser.add_argument('-cache', '--cache_entries', help='responses kept in memory', type=int, default=4096)
+    args = parser.parse_args()
+    asyncio.run(SunServer(args.host, args.port, args.cache_entries).serve_forever())
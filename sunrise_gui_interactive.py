@@ -0,0 +1,169 @@
+from sun_rise_set import iter_sun_rise_set
+from sun_plot import plot_series, build_figure, fill_figure
+from dst_rules import regions
+from concurrent.futures import ThreadPoolExecutor
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+import matplotlib.ticker as tick
+from matplotlib.widgets import TextBox, RadioButtons
+import argparse
+
+# Interactive version of the four-panel plot, the location, year and timezone are changed in the window
+#
+# Results are computed in a background thread and swapped into the existing lines; as long as the axes
+# limits stay the same (e.g. a different longitude or timezone in the same year) only the lines and the title
+# are redrawn (blitting), otherwise the figure is redrawn once.  Perihelion/solstice dates come from the
+# built-in table (1900-2100) and DST from the rules in dst_rules.py.
+#
+# example
+# -lat 40.716 -long -74.017 -elev 0 -year 2020 -years 1 -std_tz -5 -dst_rule US
+
+
+# Series of the four-panel plot for whole years, runs in the background thread
+def _series(latitude, longitude, elevation, year, num_years, std_tz, dst_rule):
+    results = iter_sun_rise_set('{0}0101'.format(year), '{0}1231'.format(year + num_years - 1), latitude,
+                                longitude, elevation, None, std_tz, dst_rule=dst_rule)
+    return plot_series(list(results), None)
+
+
+class SunViewer(object):
+    """ Four-panel plot with widgets for the location, year and timezone """
+
+    fields = [('latitude', 'Lat'), ('longitude', 'Long'), ('elevation', 'Elev'), ('year', 'Year'),
+              ('num_years', 'Years'), ('std_tz', 'Std TZ')]
+
+    def __init__(self, latitude, longitude, elevation, year, std_tz, dst_rule='none', num_years=1):
+        self.inputs = {'latitude': latitude, 'longitude': longitude, 'elevation': elevation, 'year': year,
+                       'num_years': num_years, 'std_tz': std_tz, 'dst_rule': dst_rule}
+        self.fig = plt.figure(figsize=(10, 7.5), num='Sunrise / Sunset')
+        self.template = build_figure(self.fig)
+        self.fig.subplots_adjust(bottom=0.2)
+
+        # drawn by blitting only, see _on_draw
+        self.status = self.fig.text(0.01, 0.01, '', fontsize='small')
+        self.animated = list(self.template['lines'].values()) + [self.template['main'].title, self.status]
+        for artist in self.animated:
+            artist.set_animated(True)
+
+        self.widgets = []
+        for n, (name, label) in enumerate(self.fields):
+            box = TextBox(self.fig.add_axes([0.08 + n*0.125, 0.06, 0.06, 0.04]), label + ' ',
+                          initial=str(self.inputs[name]))
+            box.on_submit(lambda text, name=name: self._on_submit(name, text))
+            self.widgets.append(box)
+        names = sorted(regions)
+        radio = RadioButtons(self.fig.add_axes([0.83, 0.005, 0.1, 0.14]), names, active=names.index(dst_rule))
+        radio.on_clicked(lambda label: self._on_submit('dst_rule', label))
+        self.widgets.append(radio)
+
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._future = None
+        self._background = None
+        self._num_years = None
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+        self.fig.canvas.mpl_connect('close_event', lambda event: self._executor.shutdown(wait=False))
+        self._timer = self.fig.canvas.new_timer(interval=50)
+        self._timer.add_callback(self._poll)
+        self._timer.start()
+        self._request()
+
+    def _on_submit(self, name, text):
+        try:
+            value = text if name == 'dst_rule' else (int(text) if name in ('year', 'num_years') else float(text))
+        except ValueError:
+            self._set_status('not a number: ' + text)
+            return
+        if name == 'num_years' and value < 1:
+            self._set_status('number of years must be at least 1: ' + text)
+            return
+        if value != self.inputs[name]:
+            self.inputs[name] = value
+            self._request()
+
+    # starts computing the current inputs, a computation that has not started yet is dropped
+    def _request(self):
+        if self._future is not None:
+            self._future.cancel()
+        i = self.inputs
+        self._future = self._executor.submit(_series, i['latitude'], i['longitude'], i['elevation'], i['year'],
+                                             i['num_years'], i['std_tz'], i['dst_rule'])
+        self._set_status('computing...')
+
+    # timer callback on the GUI thread, picks up a finished computation
+    def _poll(self):
+        future = self._future
+        if future is None or not future.done():
+            return
+        self._future = None
+        try:
+            series = future.result()
+        except ValueError as err:  # a year outside the built-in table or the DST rules
+            self._set_status('cannot plot these inputs: ' + str(err))
+            return
+        i = self.inputs
+        years = str(i['year']) if i['num_years'] == 1 else '{0}-{1}'.format(i['year'], i['year'] + i['num_years'] - 1)
+        self.status.set_text('')
+        self._show(series, 'Sunrise / Sunset {0}, {1}, {2}'.format(i['latitude'], i['longitude'], years))
+
+    def _show(self, series, title):
+        axes = (self.template['main'], self.template['day_length_ax'], self.template['roc_ax'])
+        limits = [(ax.get_xlim(), ax.get_ylim()) for ax in axes]
+        if self._num_years != self.inputs['num_years']:
+            self._num_years = self.inputs['num_years']
+            self._set_date_ticks(axes)
+            limits = None
+        fill_figure(self.template, series, title)
+        if self._background is None or limits != [(ax.get_xlim(), ax.get_ylim()) for ax in axes]:
+            self.fig.canvas.draw_idle()  # new ticks, _on_draw takes a new background
+        else:
+            self._blit()
+
+    # month ticks for a single year, year ticks for more
+    def _set_date_ticks(self, axes):
+        for ax in axes:
+            if self._num_years == 1:
+                ax.xaxis.set_major_locator(mdates.MonthLocator())
+                ax.xaxis.set_major_formatter(mdates.DateFormatter('%b'))
+                if ax is self.template['main']:
+                    ax.xaxis.set_minor_locator(mdates.DayLocator())
+            else:
+                ax.xaxis.set_major_locator(mdates.YearLocator())
+                ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+                ax.xaxis.set_minor_locator(mdates.MonthLocator() if ax is self.template['main'] else tick.NullLocator())
+
+    def _set_status(self, text):
+        self.status.set_text(text)
+        self._blit()
+
+    # a full draw leaves the animated artists out, keep it as the background and draw them on top
+    def _on_draw(self, event):
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self.animated:
+            self.fig.draw_artist(artist)
+
+    def _blit(self):
+        if self._background is None:
+            return
+        canvas = self.fig.canvas
+        canvas.restore_region(self._background)
+        for artist in self.animated:
+            self.fig.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-lat', '--latitude', help='latitude as a decimal value', type=float, default=40.716)
+    parser.add_argument('-long', '--longitude', help='longitude as a decimal value', type=float, default=-74.017)
+    parser.add_argument('-elev', '--elevation', help='elevation in meters', type=float, default=0)
+    parser.add_argument('-year', '--year', help='first year, 1900-2100', type=int, default=2020)
+    parser.add_argument('-years', '--years', help='number of years', type=int, default=1)
+    parser.add_argument('-std_tz', '--std_tz', help='Standard Timezone', type=float, default=-5)
+    parser.add_argument('-dst_rule', '--dst_rule', help='DST region', choices=sorted(regions), default='US')
+    args = parser.parse_args()
+    if args.years < 1:
+        parser.error('number of years must be at least 1')
+
+    viewer = SunViewer(args.latitude, args.longitude, args.elevation, args.year, args.std_tz, args.dst_rule,
+                       args.years)
+    plt.show()